@@ -0,0 +1,30 @@
+"""
+Generate the final contract from the annotation batches.
+
+    python -m backend.contracts --annotations backend/data/annotations --routes backend/data/etl/routes --output backend/data
+"""
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+
+from backend.services.contract_generator import ContractGenerator
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve annotation batches into the final contract")
+    parser.add_argument('--annotations', type=Path, nargs='+', required=True, help="JSONL batches or directories of them")
+    parser.add_argument('--routes', type=Path, required=True, help="routes/ dataset written by backend.etl")
+    parser.add_argument('--output', type=Path, required=True, help="Directory receiving final_contract.csv and final_contract/")
+    parser.add_argument('--full', action='store_true', help="Reprocess every batch instead of only the new ones")
+    parser.add_argument('--chunksize', type=int, default=50_000, help="Annotations read at a time")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    started = time.perf_counter()
+    stats = ContractGenerator.run(args.annotations, args.routes, args.output, full=args.full, chunksize=args.chunksize)
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    print(json.dumps(stats))
+
+if __name__ == '__main__':
+    main()
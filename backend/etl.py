@@ -0,0 +1,29 @@
+"""
+Build the partitioned Parquet visits dataset from the raw export.
+
+    python -m backend.etl --visits data/99-visitas.csv --business-days data/resultados.csv --output data/visits
+"""
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+
+from backend.services.visits_etl import VisitsETL
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental ETL of the raw visits export to partitioned Parquet")
+    parser.add_argument('--visits', type=Path, required=True, help="Raw visits CSV (timestamp, point, place)")
+    parser.add_argument('--business-days', type=Path, required=True, help="Business days CSV (fecha column)")
+    parser.add_argument('--output', type=Path, required=True, help="Directory receiving visits/ and routes/")
+    parser.add_argument('--full', action='store_true', help="Rebuild from scratch instead of adding new dates")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    started = time.perf_counter()
+    stats = VisitsETL.run(args.visits, args.business_days, args.output, full=args.full)
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    print(json.dumps(stats))
+
+if __name__ == '__main__':
+    main()
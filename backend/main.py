@@ -1,20 +1,75 @@
-from fastapi import FastAPI, HTTPException, Query, Depends
+from fastapi import FastAPI, HTTPException, Query, Depends, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from fastapi.responses import Response, StreamingResponse, JSONResponse
+from typing import Optional, List
 from pathlib import Path
 from datetime import date, timedelta
-from contextlib import asynccontextmanager
-import pandas as pd
+from contextlib import asynccontextmanager, suppress
+import asyncio
+import json
+import logging
+import secrets
+import time
 
 from backend.settings import settings
-from backend.services.filtering_visits import FilteringVisits
+from backend.services.dataset_manager import DatasetManager
+from backend.services.response_cache import ResponseCache, make_etag, etag_matches
+from backend.services.worker_pool import WorkerPool, PoolSaturated
+from backend.services.metrics import metrics, sampled, Timings
+from backend.services.cursor import Cursor, InvalidCursor
+# Modules that pull in numpy/pandas/pyarrow are imported inside the data
+# endpoints: the first dataset build imports them in the background, so
+# the server and /health, /ready and /metrics answer right away.
+
+logging.basicConfig(
+    level=settings.log_level.upper(),
+    filename=settings.log_file,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Load the CSV once at startup
-    app.state.visits_df = pd.read_csv(settings.get_data_file_path())
+    app.state.response_cache = ResponseCache(
+        max_entries=settings.cache_max_entries,
+        ttl=settings.cache_ttl,
+        enabled=settings.cache_enabled
+    )
+    # CPU-bound filtering/serialization runs here, never on the event loop
+    app.state.worker_pool = WorkerPool(
+        max_workers=settings.worker_threads,
+        max_queue=settings.worker_queue_size,
+        timeout=settings.request_timeout
+    )
+
+    for warning in settings.validate_settings():
+        logger.warning(warning)
+
+    # Requests read app.state.visits_index once; a reload swaps in a new snapshot
+    def publish(snapshot):
+        app.state.visits_index = snapshot
+        app.state.response_cache.clear()
+
+    # Serve right away and load the dataset (CSV or Parquet) in the background: parse and
+    # sort it into a date index, or with a shared snapshot dir map the files of the worker
+    # that built it. Data endpoints answer 503 and /ready stays unready until it is swapped in
+    app.state.visits_index = None
+    dataset = DatasetManager(
+        settings.get_data_file_path(),
+        start_date=settings.data_start_date,
+        end_date=settings.data_end_date,
+        snapshot_dir=settings.shared_snapshot_dir
+    )
+    dataset.on_swap(publish)
+    app.state.dataset = dataset
+
+    # First load, then pick up new exports without a restart
+    loader = asyncio.create_task(dataset.run(settings.data_watch_interval))
     yield
-    # (Optional) Cleanup code here
+    loader.cancel()
+    with suppress(asyncio.CancelledError):
+        await loader
+    app.state.worker_pool.shutdown()
 
 app = FastAPI(
     title=settings.app_name,
@@ -32,6 +87,50 @@ app.add_middleware(
     allow_headers=settings.allowed_headers,
 )
 
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+
+    # Label by route template to keep the series bounded
+    route = request.scope.get("route")
+    metrics.request_latency.observe(elapsed, route.path if route else "unmatched", request.method, str(response.status_code))
+
+    # Stage costs visible from the browser devtools
+    server_timing = f"app;dur={elapsed * 1000:.2f}"
+    timings = getattr(request.state, "timings", None)
+    if timings and timings.stages:
+        server_timing = f"{timings.server_timing()}, {server_timing}"
+    response.headers["Server-Timing"] = server_timing
+    response.headers["Timing-Allow-Origin"] = ", ".join(settings.allowed_origins)
+    return response
+
+async def offload(fn, *args, **kwargs):
+    """Run blocking work in the worker pool, mapping saturation and timeouts to HTTP errors"""
+    try:
+        return await app.state.worker_pool.run(fn, *args, **kwargs)
+    except PoolSaturated:
+        raise HTTPException(status_code=503, detail="Server busy, retry later", headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Request timed out")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def offload_stream(chunks):
+    """Encode a streamed body chunk by chunk in the worker pool, holding one slot until it ends"""
+    try:
+        return app.state.worker_pool.stream(chunks)
+    except PoolSaturated:
+        raise HTTPException(status_code=503, detail="Server busy, retry later", headers={"Retry-After": "1"})
+
+def loaded_index():
+    """The current snapshot; 503 until the first load has finished"""
+    index = app.state.visits_index
+    if index is None:
+        raise HTTPException(status_code=503, detail="Dataset is still loading, retry later", headers={"Retry-After": "5"})
+    return index
+
 def get_data_file_path() -> Path:
     return settings.get_data_file_path()
 
@@ -55,35 +154,338 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    # Liveness: the process answers, whether or not the dataset is loaded yet
+    index = app.state.visits_index
+    dataset = app.state.dataset.progress()
+    if index is not None:
+        dataset["memory_bytes"] = index.memory_usage()
     return {
         "status": "healthy", 
         "service": settings.app_name,
-        "version": settings.app_version
+        "version": settings.app_version,
+        "dataset": dataset
+    }
+
+@app.get("/ready")
+async def readiness_check():
+    # Readiness: a snapshot is loaded and requests can be served
+    index = app.state.visits_index
+    progress = app.state.dataset.progress()
+    if index is None:
+        return JSONResponse(status_code=503, content={"status": "failed" if progress["error"] else "loading", **progress}, headers={"Retry-After": "5"})
+    return {"status": "ready", **progress, "memory_bytes": index.memory_usage()}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    cache = app.state.response_cache.stats()
+    pool = app.state.worker_pool.stats()
+    index = app.state.visits_index
+    extra = [
+        sampled("visits_cache_hits_total", "Response cache hits", [({}, cache["hits"])], "counter"),
+        sampled("visits_cache_misses_total", "Response cache misses", [({}, cache["misses"])], "counter"),
+        sampled("visits_cache_evictions_total", "Response cache LRU evictions", [({}, cache["evictions"])], "counter"),
+        sampled("visits_cache_hit_ratio", "Response cache hit ratio since start", [({}, cache["hit_rate"])]),
+        sampled("visits_cache_entries", "Responses held in the cache", [({}, cache["entries"])]),
+        sampled("visits_cache_bytes", "Bytes of responses held in the cache", [({}, cache["bytes"])]),
+        sampled("visits_dataset_ready", "Whether a snapshot is loaded", [({}, int(index is not None))]),
+        sampled("visits_dataset_reloads_total", "Snapshot reloads since start", [({}, app.state.dataset.reloads)], "counter"),
+        sampled("visits_worker_pending", "Jobs running or queued in the worker pool", [({}, pool["pending"])]),
+        sampled("visits_worker_rejected_total", "Jobs rejected because the pool was saturated", [({}, pool["rejected"])], "counter"),
+        sampled("visits_worker_timeouts_total", "Jobs that exceeded the request timeout", [({}, pool["timeouts"])], "counter"),
+    ]
+    if index is not None:
+        extra += [
+            sampled("visits_dataset_rows", "Visits in the loaded snapshot", [({"version": index.version}, len(index))]),
+            sampled("visits_dataset_bytes", "Memory held by the snapshot and its indexes", [({"version": index.version}, index.memory_usage())]),
+        ]
+    return Response(content=metrics.render(extra), media_type="text/plain; version=0.0.4")
+
+@app.post("/admin/reload")
+async def reload_dataset(
+    force: bool = Query(False, description="Rebuild even if the data on disk did not change"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    # Disabled unless ADMIN_TOKEN is set: a forced rebuild is expensive
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Reload endpoint disabled, set ADMIN_TOKEN to enable it")
+    if not secrets.compare_digest((x_admin_token or "").encode(), settings.admin_token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    dataset = app.state.dataset
+    try:
+        reloaded = await dataset.reload(force=force)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload failed: {e}")
+    return {
+        "success": True,
+        "reloaded": reloaded,
+        "version": dataset.current.version,
+        "rows": len(dataset.current)
     }
 
+@app.get("/api/cache/stats")
+async def cache_stats():
+    return app.state.response_cache.stats()
+
+@app.get("/api/workers/stats")
+async def worker_stats():
+    return app.state.worker_pool.stats()
+
 @app.get("/api/visits")
 async def get_visits(
+    request: Request,
     end_date: date = Query(date(2014, 6, 11), description="Date to filter (YYYY-MM-DD)"),
-    limit: Optional[int] = Query(settings.max_records_per_request, ge=1, le=settings.max_records_per_request),
+    start_date: Optional[date] = Query(None, description="First date of the range (YYYY-MM-DD), defaults to end_date"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.max_records_per_request),
     offset: Optional[int] = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     place: Optional[str] = Query(None),
-    data_path: Path = Depends(validate_data_file)
+    format: str = Query("json", pattern="^(json|ndjson|arrow)$", description="json page, streamed ndjson or Arrow IPC stream"),
+    group: str = Query("record", pattern="^(record|day)$", description="ndjson line per record or per day"),
+    simplify: bool = Query(False, description="Collapse consecutive points at the same place"),
+    zoom: Optional[int] = Query(None, ge=0, le=22, description="Map zoom; drops points invisible at this zoom (implies simplify)"),
+    data_path: Path = Depends(validate_data_file),
+    index = Depends(loaded_index)
 ):
-    # 1-day window: start_date = end_date
-    start_date = end_date
+    from backend.services.filtering_visits import FilteringVisits
+    from backend.services.place_index import normalize_text
+    from backend.services.serializers import VisitsSerializer, NDJSON_MEDIA_TYPE, ARROW_MEDIA_TYPE
 
+    # 1-day window unless a range is requested
+    if start_date is None:
+        start_date = end_date
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    timings = request.state.timings = Timings()
     try:
-        records = FilteringVisits.filter(
-            app.state.visits_df.copy(),
+        after = Cursor.decode(cursor) if cursor else None
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Output mode: explicit format, otherwise negotiated from the Accept header
+    accept = request.headers.get("accept", "")
+    if format == "json":
+        if ARROW_MEDIA_TYPE in accept:
+            format = "arrow"
+        elif NDJSON_MEDIA_TYPE in accept:
+            format = "ndjson"
+
+    # Streamed export: rows are encoded chunk by chunk, no limit unless given
+    if format in ("ndjson", "arrow"):
+        df = await offload(
+            FilteringVisits.select,
+            index,
             place=place,
             start_date=start_date,
             end_date=end_date,
             limit=limit,
-            offset=offset
+            offset=offset,
+            simplify=simplify,
+            zoom=zoom,
+            timings=timings,
+            cursor=after
         )
-        return {"success": True, "data": records, "total": len(records)}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        metrics.observe_timings(timings)
+        next_cursor = FilteringVisits.next_cursor(index, df, limit)
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+        if format == "arrow":
+            return StreamingResponse(offload_stream(VisitsSerializer.arrow_stream(df)), media_type=ARROW_MEDIA_TYPE, headers=headers)
+        lines = VisitsSerializer.ndjson_days(df) if group == "day" else VisitsSerializer.ndjson_records(df)
+        return StreamingResponse(offload_stream(lines), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+    limit = limit or settings.max_records_per_request
+    cache = app.state.response_cache
+
+    # Normalized query, versioned by the loaded dataset
+    key = (index.version, start_date.isoformat(), end_date.isoformat(), normalize_text(place or ''), limit, offset, cursor, simplify or zoom is not None, zoom)
+    headers = {"ETag": make_etag(key), "Cache-Control": "no-cache", "Vary": "Accept"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    with timings.stage("cache"):
+        body = cache.get(key)
+    if body is not None:
+        metrics.observe_timings(timings)
+        return Response(content=body, media_type="application/json", headers={**headers, "X-Cache": "HIT"})
+
+    def render():
+        df = FilteringVisits.select(
+            index,
+            place=place,
+            start_date=start_date,
+            end_date=end_date,
+            limit=limit,
+            offset=offset,
+            simplify=simplify,
+            zoom=zoom,
+            timings=timings,
+            cursor=after
+        )
+        with timings.stage("serialize"):
+            return VisitsSerializer.json_page(df, next_cursor=FilteringVisits.next_cursor(index, df, limit))
+
+    body = await offload(render)
+    metrics.observe_timings(timings)
+    cache.set(key, body)
+    return Response(content=body, media_type="application/json", headers={**headers, "X-Cache": "MISS"})
+
+@app.get("/api/visits/count")
+async def count_visits(
+    end_date: date = Query(date(2014, 6, 11), description="Last date (YYYY-MM-DD)"),
+    start_date: Optional[date] = Query(None, description="First date of the range (YYYY-MM-DD), defaults to end_date"),
+    place: Optional[str] = Query(None),
+    simplify: bool = Query(False),
+    zoom: Optional[int] = Query(None, ge=0, le=22),
+    data_path: Path = Depends(validate_data_file),
+    index = Depends(loaded_index)
+):
+    from backend.services.filtering_visits import FilteringVisits
+
+    # Totals are not part of the pages; ask for them separately when needed
+    if start_date is None:
+        start_date = end_date
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    count = await offload(FilteringVisits.count, index, place, start_date, end_date, simplify, zoom)
+    return {"success": True, "count": count, "version": index.version}
+
+@app.get("/api/days")
+async def get_days(
+    start: Optional[date] = Query(None, description="First date (YYYY-MM-DD)"),
+    end: Optional[date] = Query(None, description="Last date (YYYY-MM-DD)"),
+    data_path: Path = Depends(validate_data_file),
+    index = Depends(loaded_index)
+):
+    from backend.services.day_summary import DaySummary
+
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    records = await offload(lambda index: DaySummary.to_records(index.days(start, end)), index)
+    return {"success": True, "data": records, "total": len(records)}
+
+@app.get("/api/days/{day}/segments")
+async def get_day_segments(
+    request: Request,
+    day: date,
+    data_path: Path = Depends(validate_data_file),
+    index = Depends(loaded_index)
+):
+    from backend.services.segmentation import Segmentation
+
+    key = ("segments", index.version, day.isoformat())
+    headers = {"ETag": make_etag(key), "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    # Segmented once per (snapshot, day), then served from the cache
+    cache = app.state.response_cache
+    body = cache.get(key)
+    headers["X-Cache"] = "MISS" if body is None else "HIT"
+    if body is None:
+        def render():
+            stops, moves = Segmentation.segments(index.slice(day, day))
+            return json.dumps({
+                "success": True,
+                "date": day.isoformat(),
+                "stops": Segmentation.to_records(stops),
+                "moves": Segmentation.to_records(moves),
+                "distance_m": round(float(moves['distance_m'].sum()), 1),
+            }, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+        body = await offload(render)
+        cache.set(key, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/api/heatmap")
+async def heatmap_info(index = Depends(loaded_index)):
+    pyramid = await offload(index.heatmap)
+    return {
+        "success": True,
+        "min_zoom": pyramid.min_zoom,
+        "max_zoom": pyramid.max_zoom,
+        "bounds": pyramid.bounds,
+        "years": pyramid.years
+    }
+
+@app.get("/api/heatmap/{z}/{x}/{y}")
+async def heatmap_tile(
+    request: Request,
+    z: int,
+    x: int,
+    y: int,
+    business_day: Optional[bool] = Query(None, description="Only business days (true) or only other days (false)"),
+    year: Optional[List[int]] = Query(None, description="Restrict to these years (repeatable)"),
+    index = Depends(loaded_index)
+):
+    pyramid = await offload(index.heatmap)
+    if not pyramid.min_zoom <= z <= pyramid.max_zoom or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=404, detail=f"No heatmap tile {z}/{x}/{y}")
+
+    # Tiles only change with the snapshot
+    key = ("heatmap", index.version, z, x, y, business_day, tuple(sorted(set(year or []))))
+    headers = {"ETag": make_etag(key), "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    cache = app.state.response_cache
+    body = cache.get(key)
+    headers["X-Cache"] = "MISS" if body is None else "HIT"
+    if body is None:
+        def render():
+            cells = pyramid.tile(z, x, y, business_day=business_day, years=year)
+            counts = cells['count']
+            return json.dumps({
+                "success": True,
+                "data": list(zip(cells['latitude'].tolist(), cells['longitude'].tolist(), counts.tolist())),
+                "total": int(counts.sum()),
+                "max": int(counts.max()) if len(counts) else 0
+            }, separators=(',', ':')).encode('utf-8')
+
+        body = await offload(render)
+        cache.set(key, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def paginated(df, limit: int, offset: int) -> Response:
+    """Page of records plus the number of matching rows"""
+    from backend.services.serializers import VisitsSerializer
+
+    page = df.iloc[offset:offset + limit]
+    return Response(content=VisitsSerializer.json_page(page, matched=len(df)), media_type="application/json")
+
+@app.get("/api/visits/nearby")
+async def get_visits_nearby(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude of the center"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude of the center"),
+    radius: float = Query(200, gt=0, le=50000, description="Radius in meters"),
+    start_date: Optional[date] = Query(None, description="First date (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Last date (YYYY-MM-DD)"),
+    limit: Optional[int] = Query(settings.max_records_per_request, ge=1, le=settings.max_records_per_request),
+    offset: Optional[int] = Query(0, ge=0),
+    data_path: Path = Depends(validate_data_file),
+    index = Depends(loaded_index)
+):
+    from backend.services.filtering_visits import FilteringVisits
+
+    df = await offload(FilteringVisits.nearby, index, lat, lon, radius, start_date, end_date)
+    return await offload(paginated, df, limit, offset)
+
+@app.get("/api/visits/bbox")
+async def get_visits_bbox(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    start_date: Optional[date] = Query(None, description="First date (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Last date (YYYY-MM-DD)"),
+    limit: Optional[int] = Query(settings.max_records_per_request, ge=1, le=settings.max_records_per_request),
+    offset: Optional[int] = Query(0, ge=0),
+    data_path: Path = Depends(validate_data_file),
+    index = Depends(loaded_index)
+):
+    from backend.services.filtering_visits import FilteringVisits
+
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="min_lat/min_lon must not exceed max_lat/max_lon")
+    df = await offload(FilteringVisits.within_bbox, index, min_lat, min_lon, max_lat, max_lon, start_date, end_date)
+    return await offload(paginated, df, limit, offset)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,54 @@
+"""
+Add road distance and duration (Google Routes API) to the moves between stops.
+
+    python -m backend.routes --start 2014-01-01 --end 2014-12-31 --output backend/data/road_moves.parquet
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+
+from backend.settings import settings
+from backend.services.dataset_manager import DatasetManager
+from backend.services.google_routes import GoogleRoutes
+from backend.services.segmentation import Segmentation
+
+def main():
+    parser = argparse.ArgumentParser(description="Road distances and durations of the moves between stops")
+    parser.add_argument('--data', type=Path, default=settings.get_data_file_path(), help="Visits CSV/Parquet (DATA_FILE_PATH)")
+    parser.add_argument('--start', help="First date (YYYY-MM-DD)")
+    parser.add_argument('--end', help="Last date (YYYY-MM-DD)")
+    parser.add_argument('--output', type=Path, required=True, help="*.parquet or *.csv")
+    parser.add_argument('--mode', default='DRIVE', help="Routes API travel mode")
+    args = parser.parse_args()
+
+    if not settings.google_routes_api_key:
+        parser.error("GOOGLE_ROUTES_API_KEY is not set")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    started = time.perf_counter()
+
+    index = DatasetManager(args.data, start_date=args.start, end_date=args.end).build()
+    stops, moves = Segmentation.segments(index.slice(args.start, args.end))
+    routes = GoogleRoutes(
+        settings.google_routes_api_key,
+        settings.get_google_routes_cache_path(),
+        base_url=settings.google_routes_base_url,
+        travel_mode=args.mode,
+        max_concurrency=settings.google_routes_concurrency
+    )
+    try:
+        moves = asyncio.run(routes.road_moves(stops, moves))
+    finally:
+        routes.close()
+
+    if args.output.suffix == '.csv':
+        moves.to_csv(args.output, index=False)
+    else:
+        moves.to_parquet(args.output, index=False)
+    stats = {**routes.stats, "moves": len(moves), "seconds": round(time.perf_counter() - started, 3)}
+    print(json.dumps(stats))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Final contract generation: annotation batches resolved against the per-day routes.
+"""
+import json
+import logging
+import shutil
+from pathlib import Path
+from typing import Iterator, List
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from backend.services.visits_storage import VisitsStorage
+
+logger = logging.getLogger(__name__)
+
+CONTRACT_CSV = 'final_contract.csv'
+CONTRACT_PARQUET = 'final_contract'
+MANIFEST = 'manifest.json'
+# Annotation columns consumed by the resolution, not part of the contract
+DROPPED_COLUMNS = ['working', 'start_point', 'end_point', 'total_points']
+
+class ContractGenerator:
+    @staticmethod
+    def batches(paths: List[Path]) -> List[Path]:
+        """Annotation JSONL files, directories expanded to their *.jsonl, in name order"""
+        files = []
+        for path in map(Path, paths):
+            files.extend(sorted(path.glob('*.jsonl')) if path.is_dir() else [path])
+        return files
+
+    @staticmethod
+    def fingerprint(path: Path) -> str:
+        stat = path.stat()
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    @staticmethod
+    def read_batch(path: Path, chunksize: int = 50_000) -> Iterator[pd.DataFrame]:
+        """Stream an annotation batch in chunks instead of loading it whole"""
+        with pd.read_json(path, lines=True, chunksize=chunksize, convert_dates=['date']) as reader:
+            yield from reader
+
+    @staticmethod
+    def resolve(annotations: pd.DataFrame, routes: pd.DataFrame) -> pd.DataFrame:
+        """
+        Keep the working days and replace start_point/end_point (indexes into
+        the day's route) by start_timestamp/end_timestamp, with one merge per end.
+        """
+        contract = annotations[annotations['working'].astype(bool)].copy()
+        contract['date'] = pd.to_datetime(contract['date']).dt.normalize()
+        lookup = pd.DataFrame({
+            'date': pd.to_datetime(routes['date']),
+            'point_index': routes['point_index'].astype('int64'),
+            'timestamp': routes['timestamp']
+        })
+        for end in ('start', 'end'):
+            points = contract[f'{end}_point'].astype('int64')
+            resolved = contract[['date']].assign(point_index=points.values).merge(
+                lookup, on=['date', 'point_index'], how='left'
+            )
+            contract[f'{end}_timestamp'] = resolved['timestamp'].values
+
+        missing = contract['start_timestamp'].isna() | contract['end_timestamp'].isna()
+        if missing.any():
+            logger.warning("%d annotations point outside their day's route", int(missing.sum()))
+        contract['date'] = contract['date'].dt.date
+        return contract.drop(columns=[c for c in DROPPED_COLUMNS if c in contract.columns]).reset_index(drop=True)
+
+    @staticmethod
+    def routes_for(routes_path: Path, annotations: pd.DataFrame) -> pd.DataFrame:
+        """The routes of the annotated date range only (partition pruned)"""
+        dates = pd.to_datetime(annotations['date'])
+        if dates.empty:
+            return pd.DataFrame(columns=['date', 'point_index', 'timestamp'])
+        return VisitsStorage.read_parquet(routes_path, start_date=dates.min(), end_date=dates.max())
+
+    @staticmethod
+    def run(
+        annotations: List[Path],
+        routes_path: Path,
+        output: Path,
+        full: bool = False,
+        chunksize: int = 50_000
+    ) -> dict:
+        """
+        Append the contracts of the batches not processed yet to
+        output/final_contract.csv and output/final_contract/<batch>.parquet.
+        A processed batch that changed or disappeared triggers a full rebuild.
+        The manifest records the CSV size after each complete batch; a rerun
+        truncates back to it, dropping the rows of an interrupted batch.
+        """
+        output = Path(output)
+        manifest_path = output / MANIFEST
+        csv_path = output / CONTRACT_CSV
+        state = {} if full or not manifest_path.exists() else json.loads(manifest_path.read_text())
+        manifest = state.get('batches', {})
+        batches = {str(p): ContractGenerator.fingerprint(p) for p in ContractGenerator.batches(annotations)}
+
+        if any(batches.get(name) != fingerprint for name, fingerprint in manifest.items()):
+            logger.info("Processed annotation batches changed, rebuilding the contract")
+            manifest = {}
+        if not manifest:
+            csv_path.unlink(missing_ok=True)
+            shutil.rmtree(output / CONTRACT_PARQUET, ignore_errors=True)
+        elif csv_path.exists() and csv_path.stat().st_size > state.get('csv_bytes', 0):
+            logger.info("Dropping the rows of an interrupted batch from %s", csv_path)
+            with open(csv_path, 'r+b') as f:
+                f.truncate(state.get('csv_bytes', 0))
+        (output / CONTRACT_PARQUET).mkdir(parents=True, exist_ok=True)
+
+        stats = {"batches": 0, "annotations": 0, "contracts": 0}
+        for name, fingerprint in batches.items():
+            if name in manifest:
+                continue
+            writer = None
+            # Left by an interrupted run of this batch
+            (output / CONTRACT_PARQUET / f"{Path(name).stem}.parquet").unlink(missing_ok=True)
+            for chunk in ContractGenerator.read_batch(Path(name), chunksize):
+                contract = ContractGenerator.resolve(chunk, ContractGenerator.routes_for(routes_path, chunk))
+                stats["annotations"] += len(chunk)
+                if contract.empty:
+                    continue
+                header = not csv_path.exists() or csv_path.stat().st_size == 0
+                contract.to_csv(csv_path, mode='a', header=header, index=False)
+                # Schema of the first chunk with contracts: an empty one has untyped columns
+                if writer is None:
+                    schema = pa.Schema.from_pandas(contract, preserve_index=False)
+                    writer = pq.ParquetWriter(output / CONTRACT_PARQUET / f"{Path(name).stem}.parquet", schema, compression='zstd')
+                writer.write_table(pa.Table.from_pandas(contract, schema=writer.schema, preserve_index=False))
+                stats["contracts"] += len(contract)
+            if writer is not None:
+                writer.close()
+            manifest[name] = fingerprint
+            # Saved per batch so an interrupted run resumes after the last complete one
+            state = {"batches": manifest, "csv_bytes": csv_path.stat().st_size if csv_path.exists() else 0}
+            manifest_path.write_text(json.dumps(state, indent=2))
+            stats["batches"] += 1
+
+        logger.info("Contract generation done: %s", stats)
+        return stats
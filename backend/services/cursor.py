@@ -0,0 +1,35 @@
+"""
+Opaque keyset pagination cursors: (timestamp, row id, snapshot version, tie rank).
+"""
+import base64
+import binascii
+import struct
+from typing import NamedTuple
+
+# Big-endian timestamp (ns), row id and tie rank, followed by the version string
+_HEADER = struct.Struct('>qqi')
+
+
+class InvalidCursor(ValueError):
+    """The cursor token is malformed"""
+
+
+class Cursor(NamedTuple):
+    timestamp: int
+    row: int
+    version: str
+    # Rows of the snapshot with this timestamp up to and including `row`
+    tie: int = 1
+
+    def encode(self) -> str:
+        raw = _HEADER.pack(self.timestamp, self.row, self.tie) + self.version.encode('ascii')
+        return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+    @staticmethod
+    def decode(token: str) -> 'Cursor':
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            timestamp, row, tie = _HEADER.unpack_from(raw)
+            return Cursor(timestamp, row, raw[_HEADER.size:].decode('ascii'), tie)
+        except (binascii.Error, struct.error, UnicodeDecodeError, ValueError):
+            raise InvalidCursor(f"Invalid cursor: {token!r}")
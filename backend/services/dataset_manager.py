@@ -0,0 +1,166 @@
+"""
+Owner of the current visits snapshot: loads, watches and hot-reloads the dataset.
+"""
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Any, Callable, List
+
+if TYPE_CHECKING:
+    from backend.services.visits_index import VisitsIndex
+
+logger = logging.getLogger(__name__)
+
+class DatasetManager:
+    """
+    Holds the current VisitsIndex and replaces it atomically on reload.
+
+    A snapshot is never modified after it is built; requests read
+    `current` once and keep working on that object, so a swap never
+    affects in-flight requests. Rebuilds run in a worker thread.
+    With a snapshot_dir, processes share each built snapshot (SnapshotStore)
+    instead of loading their own copy.
+
+    pandas/pyarrow are only imported by the first build, so creating the
+    manager is cheap and the server can answer before any data is loaded;
+    `progress()` reports what the running build is doing.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        start_date: Optional[Any] = None,
+        end_date: Optional[Any] = None,
+        snapshot_dir: Optional[Path] = None
+    ):
+        self.path = Path(path)
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir else None
+        self.start_date = start_date
+        self.end_date = end_date
+        self.current: Optional["VisitsIndex"] = None
+        self.reloads = 0
+        self.stage: Optional[str] = None
+        self.error: Optional[str] = None
+        self._stage_started: Optional[float] = None
+        self._build_started: Optional[float] = None
+        self._store = None
+        self._lock = asyncio.Lock()
+        self._listeners: List[Callable[["VisitsIndex"], None]] = []
+
+    def on_swap(self, listener: Callable[["VisitsIndex"], None]) -> None:
+        """Register a callback run with the new snapshot after every swap"""
+        self._listeners.append(listener)
+
+    def _enter(self, stage: Optional[str]) -> None:
+        now = time.monotonic()
+        if self.stage is not None:
+            logger.info("Dataset %s done in %.2fs", self.stage, now - self._stage_started)
+        self.stage, self._stage_started = stage, now
+
+    def progress(self) -> dict:
+        """Readiness and, while a build runs, its stage and elapsed seconds"""
+        now = time.monotonic()
+        state = {
+            "ready": self.current is not None,
+            "loading": self.stage is not None,
+            "stage": self.stage,
+            "error": self.error,
+        }
+        if self.stage is not None:
+            state["elapsed_seconds"] = round(now - self._build_started, 2)
+            state["stage_seconds"] = round(now - self._stage_started, 2)
+        if self.current is not None:
+            state["version"] = self.current.version
+            state["rows"] = len(self.current)
+        return state
+
+    def build(self) -> "VisitsIndex":
+        """Load the data and every derived index (blocking)"""
+        self._build_started = time.monotonic()
+        self._enter("importing")
+        try:
+            from backend.services.visits_index import VisitsIndex
+            from backend.services.visits_storage import VisitsStorage
+            from backend.services.snapshot_store import SnapshotStore
+
+            self._enter("fingerprinting")
+            version = VisitsStorage.version(self.path)
+
+            def load() -> VisitsIndex:
+                self._enter("reading")
+                df = VisitsStorage.load(self.path, start_date=self.start_date, end_date=self.end_date)
+                self._enter("indexing")
+                return VisitsIndex(df, version=version)
+
+            if self.snapshot_dir is not None:
+                if self._store is None:
+                    self._store = SnapshotStore(self.snapshot_dir)
+                self._enter("attaching")
+                index = self._store.get_or_build(version, load)
+            else:
+                index = load()
+            # Precompute the heatmap pyramid here, off the request path
+            self._enter("heatmap")
+            index.heatmap()
+            self.error = None
+            return index
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._enter(None)
+
+    def swap(self, snapshot: "VisitsIndex") -> None:
+        self.current = snapshot
+        for listener in self._listeners:
+            listener(snapshot)
+
+    async def reload(self, force: bool = False) -> bool:
+        """
+        Rebuild off the event loop and swap the snapshot in. Unless forced,
+        nothing happens when the data on disk has the loaded version.
+        Returns whether a new snapshot was swapped in.
+        """
+        async with self._lock:
+            if not force and self.current is not None:
+                from backend.services.visits_storage import VisitsStorage
+                version = await asyncio.to_thread(VisitsStorage.version, self.path)
+                if version == self.current.version:
+                    return False
+            started = time.monotonic()
+            snapshot = await asyncio.to_thread(self.build)
+            if self.current is not None:
+                self.reloads += 1
+            self.swap(snapshot)
+            logger.info(
+                "Visits dataset loaded in %.2fs: version %s, %d rows",
+                time.monotonic() - started, snapshot.version, len(snapshot)
+            )
+            return True
+
+    async def watch(self, interval: float) -> None:
+        """Poll the data file (sizes and mtimes) and reload when it changes"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload()
+            except Exception:
+                # Keep serving the previous snapshot
+                logger.exception("Reloading %s failed", self.path)
+
+    async def run(self, watch_interval: float = 0) -> None:
+        """
+        Background task: load the first snapshot, then keep watching the
+        data file. A failed first load is retried by the watcher (or every
+        few seconds without one) while the server stays up and unready.
+        """
+        retry = watch_interval if watch_interval > 0 else 5
+        while self.current is None:
+            try:
+                await self.reload(force=True)
+            except Exception:
+                logger.exception("Loading %s failed, retrying in %ss", self.path, retry)
+                await asyncio.sleep(retry)
+        if watch_interval > 0:
+            await self.watch(watch_interval)
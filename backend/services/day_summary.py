@@ -0,0 +1,77 @@
+"""
+Per-day aggregates of the visits, built once at load time.
+"""
+import numpy as np
+import pandas as pd
+
+from backend.services.geo import decode_coordinates, haversine_m
+
+class DaySummary:
+    @staticmethod
+    def build(index) -> pd.DataFrame:
+        """
+        One row per day of a VisitsIndex: visit count, distinct places,
+        first/last timestamp, duration, distance travelled and business_day.
+        Everything is computed with reductions over the day blocks of the
+        sorted frame, no per-day Python loop.
+        """
+        df = index.df
+        offsets = index.day_offsets
+        starts, stops = offsets[:-1], offsets[1:]
+        n_days = len(starts)
+        if n_days == 0:
+            return DaySummary.empty()
+
+        timestamps = df['timestamp'].values
+        first = timestamps[starts]
+        last = timestamps[stops - 1]
+
+        # Day position of every row, then distinct (day, place) pairs per day
+        row_day = np.repeat(np.arange(n_days, dtype=np.int64), stops - starts)
+        pairs = np.unique(row_day * (len(index.places) + 1) + index.place_keys)
+        places = np.bincount(pairs // (len(index.places) + 1), minlength=n_days)
+
+        # Haversine between consecutive points, zeroed where a new day starts
+        latitude = decode_coordinates(df['latitude'].values)
+        longitude = decode_coordinates(df['longitude'].values)
+        steps = np.zeros(len(df), dtype=np.float64)
+        steps[1:] = haversine_m(latitude[:-1], longitude[:-1], latitude[1:], longitude[1:])
+        steps[starts] = 0.0
+        distance = np.add.reduceat(np.nan_to_num(steps), starts)
+
+        summary = pd.DataFrame({
+            'date': index.day_numbers.astype('datetime64[D]'),
+            'visits': (stops - starts).astype(np.int32),
+            'places': places.astype(np.int32),
+            'first_timestamp': first,
+            'last_timestamp': last,
+            'duration_seconds': ((last - first) // np.timedelta64(1, 's')).astype(np.int32),
+            'distance_m': distance.astype(np.float32),
+        })
+        if 'business_day' in df.columns:
+            business_day = df['business_day'].fillna(False).values.astype(bool)
+            summary['business_day'] = np.logical_or.reduceat(business_day, starts)
+        return summary
+
+    @staticmethod
+    def empty() -> pd.DataFrame:
+        return pd.DataFrame({
+            'date': np.empty(0, dtype='datetime64[D]'),
+            'visits': np.empty(0, dtype=np.int32),
+            'places': np.empty(0, dtype=np.int32),
+            'first_timestamp': np.empty(0, dtype='datetime64[ns]'),
+            'last_timestamp': np.empty(0, dtype='datetime64[ns]'),
+            'duration_seconds': np.empty(0, dtype=np.int32),
+            'distance_m': np.empty(0, dtype=np.float32),
+        })
+
+    @staticmethod
+    def to_records(summary: pd.DataFrame) -> list:
+        """JSON-ready records (ISO dates, meters rounded to 0.1)"""
+        out = summary.assign(
+            date=summary['date'].dt.strftime('%Y-%m-%d'),
+            first_timestamp=summary['first_timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S'),
+            last_timestamp=summary['last_timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S'),
+            distance_m=summary['distance_m'].astype(np.float64).round(1)
+        )
+        return out.to_dict(orient='records')
@@ -1,47 +1,153 @@
 """
-Service for filtering visit records from a DataFrame.
+Service for filtering visit records from a VisitsIndex.
 """
-import pandas as pd
 from typing import Optional, List, Any
+import numpy as np
+import pandas as pd
+
+from backend.services.visits_index import VisitsIndex
+from backend.services.route_simplification import RouteSimplification
+from backend.services.metrics import Timings
+from backend.services.serializers import VisitsSerializer
+from backend.services.cursor import Cursor
 
 class FilteringVisits:
     @staticmethod
-    def filter(
-        df: pd.DataFrame,
+    def select(
+        index: VisitsIndex,
         place: Optional[str] = None,
-        start_date: Optional[Any] = None,  # Accepts date, datetime, or str
+        start_date: Optional[Any] = None,
         end_date: Optional[Any] = None,
         limit: Optional[int] = None,
-        offset: Optional[int] = None
-    ) -> List[dict]:
+        offset: Optional[int] = None,
+        simplify: bool = False,
+        zoom: Optional[int] = None,
+        timings: Optional[Timings] = None,
+        cursor: Optional[Cursor] = None
+    ) -> pd.DataFrame:
         """
-        Filter visit records from a DataFrame, returning a list of dicts.
+        Select the matching visit rows, sorted by timestamp. Without a place
+        filter the result is a view on the index, nothing is copied.
+        With simplify (or a zoom) the route is simplified before paginating.
+        A cursor starts the selection right after the last row of the
+        previous page, so deep pages cost the same as the first one.
+        Stage durations and row counts are recorded in `timings` if given.
         """
-        try:
-            # Always parse as datetime and remove timezone info
-            df = df.copy()
-            df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-            if hasattr(df['timestamp'].dt, 'tz'):
-                df['timestamp'] = df['timestamp'].dt.tz_localize(None)
+        timings = timings or Timings()
+        simplified = simplify or zoom is not None
 
-            if df['timestamp'].isnull().any():
-                raise ValueError("Some timestamps could not be parsed.")
+        # Date range: binary search on the day index, zero-copy slice
+        with timings.stage('lookup'):
+            start, stop = index.row_range(start_date, end_date)
+            first = start
+            if cursor is not None:
+                first = min(max(index.row_after(*cursor), start), stop)
+                # Simplification needs the cursor's whole day
+                start = max(index.day_start(first), start) if simplified and first < stop else first
+            df = index.df.iloc[start:stop]
+        timings.rows_scanned += stop - start
 
-            # Filtering
+        with timings.stage('filter'):
+            # Filtering: case/accent-insensitive substring, resolved on the place index
             if place:
-                df = df[df['place'].str.contains(place, case=False, na=False)].copy()
-            if start_date:
-                df = df[df['timestamp'].dt.date >= start_date].copy()
-            if end_date:
-                df = df[df['timestamp'].dt.date <= end_date].copy()
+                df = df.iloc[index.place_rows(place, start, stop)]
+
+            # Route simplification
+            if simplified:
+                df = RouteSimplification.simplify(df, zoom)
+                if first > start:
+                    # Row ids are the index labels of the sorted frame
+                    df = df.iloc[int(np.searchsorted(df.index.values, first)):]
 
             # Pagination
             if offset:
-                df = df.iloc[offset:].copy()
+                df = df.iloc[offset:]
             if limit:
-                df = df.iloc[:limit].copy()
+                df = df.iloc[:limit]
+        timings.rows_returned += len(df)
+        return df
+
+    @staticmethod
+    def next_cursor(index: VisitsIndex, page: pd.DataFrame, limit: Optional[int]) -> Optional[str]:
+        """Cursor token for the page after `page`, None when it was the last (short) page"""
+        if not limit or len(page) < limit:
+            return None
+        timestamp = int(page['timestamp'].values[-1].astype('datetime64[ns]').astype('int64'))
+        row = int(page.index[-1])
+        return Cursor(timestamp, row, index.version, row - index.first_row_at(timestamp) + 1).encode()
+
+    @staticmethod
+    def count(
+        index: VisitsIndex,
+        place: Optional[str] = None,
+        start_date: Optional[Any] = None,
+        end_date: Optional[Any] = None,
+        simplify: bool = False,
+        zoom: Optional[int] = None
+    ) -> int:
+        """Number of rows select() would match without pagination"""
+        if not place and not simplify and zoom is None:
+            # Two binary searches, nothing is materialized
+            start, stop = index.row_range(start_date, end_date)
+            return stop - start
+        return len(FilteringVisits.select(index, place, start_date, end_date, simplify=simplify, zoom=zoom))
+
+    @staticmethod
+    def select_rows(
+        index: VisitsIndex,
+        rows: np.ndarray,
+        start_date: Optional[Any] = None,
+        end_date: Optional[Any] = None
+    ) -> pd.DataFrame:
+        """Rows at the given (sorted) positions, restricted to the date range"""
+        start, stop = index.row_range(start_date, end_date)
+        lo, hi = np.searchsorted(rows, [start, stop])
+        return index.df.iloc[rows[lo:hi]]
+
+    @staticmethod
+    def within_bbox(
+        index: VisitsIndex,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        start_date: Optional[Any] = None,
+        end_date: Optional[Any] = None
+    ) -> pd.DataFrame:
+        """Visits inside a lat/lon box (e.g. the map viewport), sorted by timestamp"""
+        rows = index.spatial.bbox(min_lat, min_lon, max_lat, max_lon)
+        return FilteringVisits.select_rows(index, rows, start_date, end_date)
+
+    @staticmethod
+    def nearby(
+        index: VisitsIndex,
+        latitude: float,
+        longitude: float,
+        radius: float,
+        start_date: Optional[Any] = None,
+        end_date: Optional[Any] = None
+    ) -> pd.DataFrame:
+        """Visits within `radius` meters of a point, sorted by timestamp"""
+        rows = index.spatial.radius(latitude, longitude, radius)
+        return FilteringVisits.select_rows(index, rows, start_date, end_date)
 
-            return df.to_dict(orient='records')
+    @staticmethod
+    def filter(
+        index: VisitsIndex,
+        place: Optional[str] = None,
+        start_date: Optional[Any] = None,  # Accepts date, datetime, or str
+        end_date: Optional[Any] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        simplify: bool = False,
+        zoom: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Filter visit records from a VisitsIndex, returning a list of dicts.
+        """
+        try:
+            df = FilteringVisits.select(index, place, start_date, end_date, limit, offset, simplify, zoom)
+            return VisitsSerializer.expand(df).to_dict(orient='records')
         except Exception as e:
             # Raise a clear error for FastAPI to catch
             raise RuntimeError(f"Error loading data: {e}")
@@ -0,0 +1,40 @@
+"""
+Vectorized geographic helpers.
+"""
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+# Length of one degree of latitude, in meters
+METERS_PER_DEGREE = 111320.0
+
+
+def haversine_m(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in meters between (lat1, lon1) and (lat2, lon2), element-wise"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=np.float64)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+# Stored coordinates are int32 degrees scaled by 1e7 (~1 cm steps, 4 bytes
+# per value); missing ones hold the int32 minimum
+COORDINATE_SCALE = 10_000_000
+MISSING_COORDINATE = np.iinfo(np.int32).min
+
+
+def encode_coordinates(values) -> np.ndarray:
+    """Degrees to scaled int32, NaN to MISSING_COORDINATE"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, MISSING_COORDINATE, dtype=np.int32)
+    valid = np.isfinite(values)
+    out[valid] = np.round(values[valid] * COORDINATE_SCALE)
+    return out
+
+
+def decode_coordinates(values) -> np.ndarray:
+    """Scaled int32 back to float64 degrees (NaN where missing); other dtypes are taken as degrees"""
+    values = np.asarray(values)
+    if values.dtype != np.int32:
+        return values.astype(np.float64)
+    out = values / COORDINATE_SCALE
+    out[values == MISSING_COORDINATE] = np.nan
+    return out
@@ -0,0 +1,259 @@
+"""
+Road distance and duration between stops from the Google Routes API, batched and disk-cached.
+"""
+import asyncio
+import logging
+import random
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://routes.googleapis.com'
+MATRIX_PATH = '/distanceMatrix/v2:computeRouteMatrix'
+FIELD_MASK = 'originIndex,destinationIndex,status,condition,distanceMeters,duration'
+# Elements (origins x destinations) allowed per matrix request
+MAX_ELEMENTS = 625
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# (origin lat, origin lon, destination lat, destination lon) in rounded integer units
+Leg = Tuple[int, int, int, int]
+
+class RoutesError(Exception):
+    """The Routes API failed after every retry"""
+
+
+class LegCache:
+    """SQLite table of computed legs, keyed by rounded coordinates and travel mode"""
+
+    def __init__(self, path: Path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path))
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS legs ("
+            " mode TEXT, o_lat INTEGER, o_lon INTEGER, d_lat INTEGER, d_lon INTEGER,"
+            " distance_m REAL, duration_s REAL, fetched_at REAL,"
+            " PRIMARY KEY (mode, o_lat, o_lon, d_lat, d_lon))"
+        )
+        self._db.commit()
+
+    def get(self, mode: str, legs: List[Leg]) -> Dict[Leg, Tuple[Optional[float], Optional[float]]]:
+        found = {}
+        # Chunked to stay under SQLite's bound parameter limit
+        for i in range(0, len(legs), 200):
+            chunk = legs[i:i + 200]
+            where = ' OR '.join(['(o_lat=? AND o_lon=? AND d_lat=? AND d_lon=?)'] * len(chunk))
+            rows = self._db.execute(
+                f"SELECT o_lat, o_lon, d_lat, d_lon, distance_m, duration_s FROM legs WHERE mode=? AND ({where})",
+                [mode, *(v for leg in chunk for v in leg)]
+            )
+            for o_lat, o_lon, d_lat, d_lon, distance, duration in rows:
+                found[(o_lat, o_lon, d_lat, d_lon)] = (distance, duration)
+        return found
+
+    def put(self, mode: str, results: Dict[Leg, Tuple[Optional[float], Optional[float]]]) -> None:
+        now = time.time()
+        self._db.executemany(
+            "INSERT OR REPLACE INTO legs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(mode, *leg, distance, duration, now) for leg, (distance, duration) in results.items()]
+        )
+        self._db.commit()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM legs").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class GoogleRoutes:
+    """
+    Routes API client for many origin/destination legs.
+
+    Coordinates are rounded (precision decimals, 4 = ~11 m) so repeated
+    legs between the same places collapse to one key; known keys come
+    from the SQLite cache and only the missing ones are requested.
+    Missing legs are packed into matrix requests (rows of one origin
+    with its destinations, merged while the matrix stays within
+    max_elements and at least min_fill of its billed elements are legs
+    we need: elements are billed, so the default trades a few more
+    requests for almost no waste). At most max_concurrency requests are in flight; 429/5xx
+    and transport errors are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        cache_path: Path,
+        base_url: str = DEFAULT_BASE_URL,
+        travel_mode: str = 'DRIVE',
+        precision: int = 4,
+        max_elements: int = MAX_ELEMENTS,
+        min_fill: float = 0.9,
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        timeout: float = 30,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.travel_mode = travel_mode
+        self.precision = precision
+        self.max_elements = max_elements
+        self.min_fill = min_fill
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.transport = transport
+        self.cache = LegCache(cache_path)
+        self.stats = {"legs": 0, "unique": 0, "cached": 0, "requests": 0, "elements": 0, "retries": 0}
+
+    def round_legs(self, legs: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Integer (o_lat, o_lon, d_lat, d_lon) keys of the rows with all four coordinates, and that mask"""
+        values = legs[['o_lat', 'o_lon', 'd_lat', 'd_lon']].to_numpy(dtype=np.float64)
+        valid = np.isfinite(values).all(axis=1)
+        return np.round(values[valid] * 10 ** self.precision).astype(np.int64), valid
+
+    def plan(self, legs: List[Leg]) -> List[Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]]:
+        """Group legs into (origins, destinations) matrices"""
+        rows: Dict[Tuple[int, int], set] = {}
+        for o_lat, o_lon, d_lat, d_lon in legs:
+            rows.setdefault((o_lat, o_lon), set()).add((d_lat, d_lon))
+
+        batches = []
+        origins: List[Tuple[int, int]] = []
+        destinations: set = set()
+        needed = 0
+        # Origins with similar destination sets end up next to each other
+        for origin, targets in sorted(rows.items(), key=lambda item: sorted(item[1])):
+            for start in range(0, len(targets), self.max_elements):
+                chunk = set(sorted(targets)[start:start + self.max_elements])
+                merged = destinations | chunk
+                elements = (len(origins) + 1) * len(merged)
+                if origins and (elements > self.max_elements or (needed + len(chunk)) / elements < self.min_fill):
+                    batches.append((origins, sorted(destinations)))
+                    origins, merged, needed = [], chunk, 0
+                origins = origins + [origin]
+                destinations = merged
+                needed += len(chunk)
+        if origins:
+            batches.append((origins, sorted(destinations)))
+        return batches
+
+    def _waypoint(self, point: Tuple[int, int]) -> dict:
+        scale = 10 ** self.precision
+        return {"waypoint": {"location": {"latLng": {"latitude": point[0] / scale, "longitude": point[1] / scale}}}}
+
+    async def _request(self, client: httpx.AsyncClient, body: dict) -> list:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await client.post(MATRIX_PATH, json=body)
+                if response.status_code not in RETRY_STATUSES:
+                    if response.is_error:
+                        raise RoutesError(f"Routes API answered HTTP {response.status_code}: {response.text[:200]}")
+                    return response.json()
+                retry_after = response.headers.get('retry-after')
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else None
+                error = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                delay, error = None, str(e)
+            if attempt == self.max_retries:
+                raise RoutesError(f"Routes API failed after {attempt + 1} attempts: {error}")
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay if delay is not None else self.backoff * 2 ** attempt * (1 + random.random()))
+
+    async def _fetch(self, client, semaphore, origins, destinations, wanted: set) -> Dict[Leg, tuple]:
+        body = {
+            "origins": [self._waypoint(o) for o in origins],
+            "destinations": [self._waypoint(d) for d in destinations],
+            "travelMode": self.travel_mode,
+        }
+        async with semaphore:
+            elements = await self._request(client, body)
+        self.stats["requests"] += 1
+        self.stats["elements"] += len(origins) * len(destinations)
+
+        results = {}
+        for element in elements:
+            # Proto3 JSON omits zero indexes
+            origin = origins[element.get('originIndex', 0)]
+            destination = destinations[element.get('destinationIndex', 0)]
+            leg = (*origin, *destination)
+            if leg not in wanted:
+                continue
+            if element.get('status', {}).get('code') or element.get('condition') != 'ROUTE_EXISTS':
+                results[leg] = (None, None)
+            else:
+                duration = element.get('duration', '0s')
+                results[leg] = (float(element.get('distanceMeters', 0)), float(duration.rstrip('s') or 0))
+        # Cached per batch so an interrupted run keeps what it paid for
+        self.cache.put(self.travel_mode, results)
+        return results
+
+    async def compute(self, legs: pd.DataFrame) -> pd.DataFrame:
+        """
+        Road distance_m and duration_s for every row of `legs` (o_lat, o_lon,
+        d_lat, d_lon), aligned with it; NaN where no route exists.
+        """
+        keys, valid = self.round_legs(legs)
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True) if len(keys) else (keys, np.zeros(0, dtype=np.int64))
+        unique_legs = [tuple(int(v) for v in row) for row in unique]
+        known = self.cache.get(self.travel_mode, unique_legs)
+        missing = [leg for leg in unique_legs if leg not in known and leg[:2] != leg[2:]]
+        self.stats["legs"] += len(legs)
+        self.stats["unique"] += len(unique_legs)
+        self.stats["cached"] += len(known)
+
+        if missing:
+            wanted = set(missing)
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            headers = {"X-Goog-Api-Key": self.api_key, "X-Goog-FieldMask": FIELD_MASK}
+            async with httpx.AsyncClient(
+                base_url=self.base_url, headers=headers, timeout=self.timeout, transport=self.transport
+            ) as client:
+                fetched = await asyncio.gather(*(
+                    self._fetch(client, semaphore, origins, destinations, wanted)
+                    for origins, destinations in self.plan(missing)
+                ))
+            for results in fetched:
+                known.update(results)
+
+        distance = np.full(len(unique_legs), np.nan)
+        duration = np.full(len(unique_legs), np.nan)
+        for i, leg in enumerate(unique_legs):
+            if leg[:2] == leg[2:]:
+                # Same rounded point: no trip
+                distance[i] = duration[i] = 0.0
+            elif leg in known:
+                distance[i], duration[i] = (np.nan if v is None else v for v in known[leg])
+        result = pd.DataFrame({'distance_m': np.nan, 'duration_s': np.nan}, index=legs.index)
+        inverse = np.asarray(inverse).ravel()
+        result.loc[valid, 'distance_m'] = distance[inverse]
+        result.loc[valid, 'duration_s'] = duration[inverse]
+        return result
+
+    @staticmethod
+    def move_legs(stops: pd.DataFrame, moves: pd.DataFrame) -> pd.DataFrame:
+        """Origin/destination coordinates (stop centroids) of Segmentation moves"""
+        coordinates = stops.set_index(['date', 'stop'])[['latitude', 'longitude']]
+        origin = coordinates.reindex(pd.MultiIndex.from_arrays([moves['date'], moves['from_stop']])).to_numpy()
+        destination = coordinates.reindex(pd.MultiIndex.from_arrays([moves['date'], moves['to_stop']])).to_numpy()
+        return pd.DataFrame({
+            'o_lat': origin[:, 0], 'o_lon': origin[:, 1],
+            'd_lat': destination[:, 0], 'd_lon': destination[:, 1]
+        }, index=moves.index)
+
+    async def road_moves(self, stops: pd.DataFrame, moves: pd.DataFrame) -> pd.DataFrame:
+        """Moves with road_distance_m and road_duration_s added"""
+        road = await self.compute(self.move_legs(stops, moves))
+        return moves.assign(road_distance_m=road['distance_m'], road_duration_s=road['duration_s'])
+
+    def close(self) -> None:
+        self.cache.close()
@@ -0,0 +1,150 @@
+"""
+Multi-zoom visit density pyramid over web-mercator tiles.
+"""
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from backend.services.geo import decode_coordinates
+
+# Each tile is split into CELLS_PER_SIDE x CELLS_PER_SIDE density cells
+CELL_BITS = 6
+CELLS_PER_SIDE = 1 << CELL_BITS
+# Key layout: tile id | group (year, business_day) | cell within the tile
+GROUP_BITS = 8
+KEY_SHIFT = 2 * CELL_BITS + GROUP_BITS
+MAX_LATITUDE = 85.05112878
+
+def to_mercator(latitude: np.ndarray, longitude: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Normalized web-mercator coordinates in [0, 1), y growing southwards"""
+    lat = np.radians(np.clip(np.asarray(latitude, dtype=np.float64), -MAX_LATITUDE, MAX_LATITUDE))
+    x = (np.asarray(longitude, dtype=np.float64) + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0
+    return np.clip(x, 0.0, np.nextafter(1.0, 0)), np.clip(y, 0.0, np.nextafter(1.0, 0))
+
+def from_mercator(x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    longitude = x * 360.0 - 180.0
+    latitude = np.degrees(np.arctan(np.sinh(np.pi * (1.0 - 2.0 * y))))
+    return latitude, longitude
+
+class HeatmapPyramid:
+    """
+    Visit counts per density cell for every zoom level, split by year and
+    business_day.
+
+    Built once per snapshot with vectorized binning: the finest level
+    bins every visit, each coarser level merges 2x2 cells of the level
+    below. Per zoom, keys are sorted so one tile (all its cells and
+    groups) is a single contiguous run found by binary search.
+    """
+
+    def __init__(self, df: pd.DataFrame, min_zoom: int = 0, max_zoom: int = 14):
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.levels: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+        latitude = decode_coordinates(df['latitude'].values)
+        longitude = decode_coordinates(df['longitude'].values)
+        valid = np.isfinite(latitude) & np.isfinite(longitude)
+        latitude, longitude = latitude[valid], longitude[valid]
+
+        years = df['timestamp'].values[valid].astype('datetime64[Y]').astype(np.int64) + 1970
+        self.first_year = int(years.min()) if len(years) else 1970
+        self.years = sorted(int(y) for y in np.unique(years))
+        business_day = (
+            df['business_day'].values[valid].astype(bool)
+            if 'business_day' in df.columns else np.zeros(len(years), dtype=bool)
+        )
+        groups = (years - self.first_year) * 2 + business_day
+
+        if len(latitude):
+            self.bounds = [
+                [float(latitude.min()), float(longitude.min())],
+                [float(latitude.max()), float(longitude.max())]
+            ]
+        else:
+            self.bounds = None
+
+        scale = float(1 << (max_zoom + CELL_BITS))
+        x, y = to_mercator(latitude, longitude)
+        cell_x = (x * scale).astype(np.int64)
+        cell_y = (y * scale).astype(np.int64)
+        counts = np.ones(len(cell_x), dtype=np.int64)
+
+        for zoom in range(max_zoom, min_zoom - 1, -1):
+            # Keys are unique per (cell, group): one 1-D unique merges duplicates
+            keys, first, inverse = np.unique(
+                self._keys(zoom, cell_x, cell_y, groups), return_index=True, return_inverse=True
+            )
+            counts = np.bincount(inverse, weights=counts, minlength=len(keys)).astype(np.int64)
+            self.levels[zoom] = (keys, counts.astype(np.int32))
+            # Parent cells of the next, coarser level
+            cell_x, cell_y, groups = cell_x[first] >> 1, cell_y[first] >> 1, groups[first]
+
+    @classmethod
+    def restore(
+        cls,
+        levels: Dict[int, Tuple[np.ndarray, np.ndarray]],
+        first_year: int,
+        years: Sequence[int],
+        bounds: Optional[list]
+    ) -> 'HeatmapPyramid':
+        """Reassemble a pyramid from its per-zoom (keys, counts) arrays"""
+        pyramid = cls.__new__(cls)
+        pyramid.min_zoom = min(levels)
+        pyramid.max_zoom = max(levels)
+        pyramid.levels = levels
+        pyramid.first_year = first_year
+        pyramid.years = list(years)
+        pyramid.bounds = bounds
+        return pyramid
+
+    @staticmethod
+    def _keys(zoom: int, cell_x: np.ndarray, cell_y: np.ndarray, groups: np.ndarray) -> np.ndarray:
+        tile_id = ((cell_x >> CELL_BITS) << zoom) | (cell_y >> CELL_BITS)
+        local = ((cell_y & (CELLS_PER_SIDE - 1)) << CELL_BITS) | (cell_x & (CELLS_PER_SIDE - 1))
+        return (tile_id << KEY_SHIFT) | (groups << (2 * CELL_BITS)) | local
+
+    def group_mask(self, business_day: Optional[bool] = None, years: Optional[Sequence[int]] = None) -> np.ndarray:
+        """Selected groups, indexed by group id"""
+        mask = np.ones(1 << GROUP_BITS, dtype=bool)
+        ids = np.arange(1 << GROUP_BITS)
+        if business_day is not None:
+            mask &= (ids % 2).astype(bool) == business_day
+        if years:
+            mask &= np.isin(ids // 2 + self.first_year, list(years))
+        return mask
+
+    def tile(
+        self,
+        zoom: int,
+        x: int,
+        y: int,
+        business_day: Optional[bool] = None,
+        years: Optional[Sequence[int]] = None
+    ) -> pd.DataFrame:
+        """Non-empty cells of one tile as latitude/longitude (cell centers) and count"""
+        keys, counts = self.levels[zoom]
+        tile_id = (x << zoom) | y
+        lo, hi = np.searchsorted(keys, [tile_id << KEY_SHIFT, (tile_id + 1) << KEY_SHIFT])
+        keys, counts = keys[lo:hi], counts[lo:hi]
+
+        groups = (keys >> (2 * CELL_BITS)) & ((1 << GROUP_BITS) - 1)
+        selected = self.group_mask(business_day, years)[groups]
+        local = keys[selected] & ((1 << (2 * CELL_BITS)) - 1)
+        per_cell = np.bincount(local, weights=counts[selected], minlength=CELLS_PER_SIDE ** 2)
+
+        cells = np.flatnonzero(per_cell)
+        scale = float(1 << (zoom + CELL_BITS))
+        latitude, longitude = from_mercator(
+            ((x << CELL_BITS) + (cells & (CELLS_PER_SIDE - 1)) + 0.5) / scale,
+            ((y << CELL_BITS) + (cells >> CELL_BITS) + 0.5) / scale
+        )
+        return pd.DataFrame({
+            'latitude': latitude.round(6),
+            'longitude': longitude.round(6),
+            'count': per_cell[cells].astype(np.int64)
+        })
+
+    def memory_usage(self) -> int:
+        return sum(keys.nbytes + counts.nbytes for keys, counts in self.levels.values())
@@ -0,0 +1,136 @@
+"""
+Minimal Prometheus metrics (text exposition format) and per-request stage timings.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+# Seconds; covers sub-millisecond cache hits up to multi-second exports
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = ['%s="%s"' % (n, _escape(v)) for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.label_names = name, help, labels
+        self._values: Dict[Tuple[str, ...], float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] += amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name, self.help, self.label_names = name, help, labels
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts (non-cumulative), then sum and count
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    bucket = _labels(self.label_names, labels, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+                bucket = _labels(self.label_names, labels, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{bucket} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+def sampled(name: str, help: str, samples: Iterable[Tuple[Dict[str, str], float]], kind: str = 'gauge') -> List[str]:
+    """Render a gauge (or counter) from (labels, value) samples computed at scrape time"""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        names = tuple(labels)
+        lines.append(f"{name}{_labels(names, tuple(labels[n] for n in names))} {float(value)}")
+    return lines
+
+
+class Timings:
+    """Stage durations and row counts of one request, for metrics and Server-Timing"""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.rows_scanned = 0
+        self.rows_returned = 0
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def server_timing(self) -> str:
+        return ', '.join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items())
+
+
+class Metrics:
+    """Process-wide registry of the backend metrics"""
+
+    def __init__(self):
+        self.request_latency = Histogram(
+            'http_request_duration_seconds', 'Request latency by route', ('route', 'method', 'status')
+        )
+        self.stage_latency = Histogram(
+            'visits_stage_duration_seconds', 'Time spent per stage of the visits pipeline', ('stage',)
+        )
+        self.rows_scanned = Counter('visits_rows_scanned_total', 'Rows in the date slices examined by queries')
+        self.rows_returned = Counter('visits_rows_returned_total', 'Rows returned to clients')
+
+    def observe_timings(self, timings: Timings) -> None:
+        for stage, seconds in timings.stages.items():
+            self.stage_latency.observe(seconds, stage)
+        self.rows_scanned.inc(timings.rows_scanned)
+        self.rows_returned.inc(timings.rows_returned)
+
+    def render(self, extra: Iterable[List[str]] = ()) -> str:
+        lines = []
+        for metric in (self.request_latency, self.stage_latency, self.rows_scanned, self.rows_returned):
+            lines.extend(metric.render())
+        for block in extra:
+            lines.extend(block)
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
@@ -0,0 +1,64 @@
+"""
+Trigram index over the distinct place names for substring searches.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable
+import numpy as np
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Case- and accent-fold a string and collapse whitespace ("Bogotá " -> "bogota")"""
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    folded = ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+    return _WHITESPACE.sub(' ', folded).strip()
+
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class PlaceIndex:
+    """
+    Substring index over the categories of the place column.
+
+    A query is normalized, candidate categories come from intersecting the
+    posting lists of its trigrams and are then verified, so a search costs
+    a function of the number of distinct places, not of the number of visits.
+    """
+
+    def __init__(self, places: Iterable[str]):
+        self.names = [normalize_text(place) for place in places]
+        postings: Dict[str, list] = defaultdict(list)
+        for code, name in enumerate(self.names):
+            for gram in trigrams(name):
+                postings[gram].append(code)
+        self.postings = {gram: np.array(codes, dtype=np.int32) for gram, codes in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def match_codes(self, query: str) -> np.ndarray:
+        """Category codes whose normalized name contains the normalized query"""
+        query = normalize_text(query)
+        if not query:
+            return np.arange(len(self.names), dtype=np.int32)
+
+        if len(query) < 3:
+            candidates = range(len(self.names))
+        else:
+            grams = trigrams(query)
+            if any(gram not in self.postings for gram in grams):
+                return np.empty(0, dtype=np.int32)
+            # Intersect the shortest posting lists first
+            lists = sorted((self.postings[gram] for gram in grams), key=len)
+            candidates = lists[0]
+            for codes in lists[1:]:
+                candidates = np.intersect1d(candidates, codes, assume_unique=True)
+                if not len(candidates):
+                    return np.empty(0, dtype=np.int32)
+
+        return np.array([code for code in candidates if query in self.names[code]], dtype=np.int32)
@@ -0,0 +1,106 @@
+"""
+Route simplification: consecutive-duplicate collapsing and Douglas-Peucker.
+"""
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+from backend.services.geo import decode_coordinates, METERS_PER_DEGREE
+
+# Web-mercator ground resolution at zoom 0, in meters per pixel at the equator
+METERS_PER_PIXEL_Z0 = 156543.03392
+# Geometry finer than this many pixels is invisible at the requested zoom
+TOLERANCE_PIXELS = 2
+
+class RouteSimplification:
+    @staticmethod
+    def day_bounds(df: pd.DataFrame) -> np.ndarray:
+        """Start offsets of each day block (plus the final length) of a timestamp-sorted frame"""
+        days = df['timestamp'].values.astype('datetime64[D]')
+        changes = np.flatnonzero(days[1:] != days[:-1]) + 1
+        return np.concatenate(([0], changes, [len(df)])).astype(np.int64)
+
+    @staticmethod
+    def tolerance_for_zoom(zoom: int, latitude: float) -> float:
+        """Simplification tolerance in meters for a web map zoom level at a given latitude"""
+        meters_per_pixel = METERS_PER_PIXEL_Z0 * np.cos(np.radians(latitude)) / (2 ** zoom)
+        return float(TOLERANCE_PIXELS * meters_per_pixel)
+
+    @staticmethod
+    def collapse_consecutive(df: pd.DataFrame) -> np.ndarray:
+        """
+        Mask keeping the first row of every run of the same place within a
+        day (a new day always starts a run). The one definition of a route
+        stop, shared by the ETL routes and the segmentation.
+        """
+        if df.empty:
+            return np.zeros(0, dtype=bool)
+        places = df['place']
+        keys = places.cat.codes.values if isinstance(places.dtype, pd.CategoricalDtype) else pd.factorize(places)[0]
+        keep = np.ones(len(df), dtype=bool)
+        keep[1:] = keys[1:] != keys[:-1]
+        keep[RouteSimplification.day_bounds(df)[:-1]] = True
+        return keep
+
+    @staticmethod
+    def douglas_peucker(latitude: np.ndarray, longitude: np.ndarray, tolerance: float) -> np.ndarray:
+        """
+        Mask of the points kept by Douglas-Peucker with a tolerance in meters.
+        Coordinates are projected to local meters (equirectangular), and the
+        distances of each segment's interior points are computed in one pass.
+        """
+        n = len(latitude)
+        keep = np.zeros(n, dtype=bool)
+        if n == 0:
+            return keep
+        keep[0] = keep[-1] = True
+        if n < 3:
+            return keep
+
+        scale = np.cos(np.radians(np.nanmean(latitude)))
+        y = np.asarray(latitude, dtype=np.float64) * METERS_PER_DEGREE
+        x = np.asarray(longitude, dtype=np.float64) * METERS_PER_DEGREE * scale
+
+        stack = [(0, n - 1)]
+        while stack:
+            first, last = stack.pop()
+            if last - first < 2:
+                continue
+            dx, dy = x[last] - x[first], y[last] - y[first]
+            px, py = x[first + 1:last] - x[first], y[first + 1:last] - y[first]
+            length_sq = dx * dx + dy * dy
+            if length_sq == 0:
+                distances = np.hypot(px, py)
+            else:
+                # Distance to the segment (projection clamped to its ends)
+                t = np.clip((px * dx + py * dy) / length_sq, 0.0, 1.0)
+                distances = np.hypot(px - t * dx, py - t * dy)
+            farthest = int(np.argmax(distances))
+            if distances[farthest] > tolerance:
+                split = first + 1 + farthest
+                keep[split] = True
+                stack.append((first, split))
+                stack.append((split, last))
+        return keep
+
+    @staticmethod
+    def simplify(df: pd.DataFrame, zoom: Optional[int] = None) -> pd.DataFrame:
+        """
+        Collapse consecutive same-place points and, when a zoom is given,
+        drop points that would not be visible at that zoom. Each day is
+        simplified on its own; the input must be sorted by timestamp.
+        """
+        df = df.iloc[np.flatnonzero(RouteSimplification.collapse_consecutive(df))]
+        if zoom is None or df.empty:
+            return df
+
+        latitude = decode_coordinates(df['latitude'].values)
+        longitude = decode_coordinates(df['longitude'].values)
+        tolerance = RouteSimplification.tolerance_for_zoom(zoom, float(np.nanmean(latitude)))
+        keep = np.zeros(len(df), dtype=bool)
+        bounds = RouteSimplification.day_bounds(df)
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            keep[start:stop] = RouteSimplification.douglas_peucker(
+                latitude[start:stop], longitude[start:stop], tolerance
+            )
+        return df.iloc[np.flatnonzero(keep)]
@@ -0,0 +1,90 @@
+"""
+Stop/move segmentation of the visits: where the route dwelt and how it moved.
+"""
+from typing import Tuple
+import numpy as np
+import pandas as pd
+
+from backend.services.geo import decode_coordinates, haversine_m
+from backend.services.route_simplification import RouteSimplification
+
+def _first_of_group(keys: np.ndarray) -> np.ndarray:
+    """For each element of a sorted key array, the position where its group starts"""
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.zeros(0, dtype=np.int64)
+    return np.repeat(starts, np.diff(np.r_[starts, len(keys)]))
+
+class Segmentation:
+    @staticmethod
+    def segments(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Split a timestamp-sorted frame (any number of days) into stops and moves.
+
+        A stop is a run of consecutive points at the same place within a day:
+        arrival and departure are its first and last timestamps, `stop` is
+        its number within the day (the point index of the deduplicated
+        route used by the annotations), first_point/last_point its raw point
+        indexes. A move joins two consecutive stops of a day, with the
+        great-circle distance between the last point of one and the first
+        point of the next. Everything is computed over whole columns.
+        """
+        n = len(df)
+        timestamps = df['timestamp'].values
+        places = df['place']
+        latitude = decode_coordinates(df['latitude'].values)
+        longitude = decode_coordinates(df['longitude'].values)
+        days = timestamps.astype('datetime64[D]')
+
+        # Stop boundaries: the place or the day changes
+        starts = np.flatnonzero(RouteSimplification.collapse_consecutive(df))
+        ends = np.append(starts[1:], n)[:len(starts)] - 1
+        stop_days = days[starts]
+        numbers = np.arange(len(starts)) - _first_of_group(stop_days)
+        row_in_day = np.arange(n) - _first_of_group(days)
+        points = ends - starts + 1
+
+        stops = pd.DataFrame({
+            'date': stop_days,
+            'stop': numbers.astype(np.int32),
+            'place': places.values[starts],
+            'arrival': timestamps[starts],
+            'departure': timestamps[ends],
+            'dwell_seconds': ((timestamps[ends] - timestamps[starts]) // np.timedelta64(1, 's')).astype(np.int64),
+            'points': points.astype(np.int32),
+            'first_point': row_in_day[starts].astype(np.int32),
+            'last_point': row_in_day[ends].astype(np.int32),
+            'latitude': np.add.reduceat(latitude, starts) / points if n else np.zeros(0),
+            'longitude': np.add.reduceat(longitude, starts) / points if n else np.zeros(0),
+        })
+
+        # Moves between consecutive stops of the same day
+        same_day = stop_days[1:] == stop_days[:-1]
+        origin, destination = np.flatnonzero(same_day), np.flatnonzero(same_day) + 1
+        departure, arrival = ends[origin], starts[destination]
+        moves = pd.DataFrame({
+            'date': stop_days[origin],
+            'from_stop': numbers[origin].astype(np.int32),
+            'to_stop': numbers[destination].astype(np.int32),
+            'from_place': places.values[departure],
+            'to_place': places.values[arrival],
+            'departure': timestamps[departure],
+            'arrival': timestamps[arrival],
+            'duration_seconds': ((timestamps[arrival] - timestamps[departure]) // np.timedelta64(1, 's')).astype(np.int64),
+            'distance_m': haversine_m(latitude[departure], longitude[departure], latitude[arrival], longitude[arrival]),
+        })
+        return stops, moves
+
+    @staticmethod
+    def to_records(frame: pd.DataFrame) -> list:
+        """JSON-ready records (ISO dates and timestamps, rounded coordinates and meters)"""
+        out = frame.assign(date=pd.to_datetime(frame['date']).dt.strftime('%Y-%m-%d'))
+        for column in ('arrival', 'departure'):
+            out[column] = pd.to_datetime(frame[column]).dt.strftime('%Y-%m-%dT%H:%M:%S')
+        for column in ('from_place', 'to_place', 'place'):
+            if column in out.columns:
+                out[column] = out[column].astype(object)
+        if 'distance_m' in out.columns:
+            out['distance_m'] = out['distance_m'].round(1)
+        if 'latitude' in out.columns:
+            out['latitude'] = out['latitude'].round(6)
+            out['longitude'] = out['longitude'].round(6)
+        return out.to_dict(orient='records')
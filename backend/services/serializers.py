@@ -0,0 +1,125 @@
+"""
+Serializers turning selected visit rows into response bodies.
+"""
+import io
+import json
+from typing import Iterator
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from backend.services.geo import decode_coordinates
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+# Coordinates are stored as int32 x 1e7, so 7 decimals (~1 cm) are exact.
+# Rebuilt points are these values, not the source strings: digits past the
+# 7th decimal are not kept
+COORDINATE_DECIMALS = 7
+
+class VisitsSerializer:
+    @staticmethod
+    def expand(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Rebuild the public record layout from the compact frame: the "lat,lon"
+        point and the date strings, coordinates decoded back to float64 degrees
+        (rounded to COORDINATE_DECIMALS).
+        """
+        out = {'timestamp': df['timestamp']}
+        latitude, longitude = VisitsSerializer._degrees(df)
+        out['point'] = df['point'] if 'point' in df else latitude.astype(str) + ',' + longitude.astype(str)
+        out['place'] = df['place']
+        out['date'] = df['date'] if 'date' in df else df['timestamp'].dt.strftime('%Y-%m-%d')
+        out['latitude'] = latitude
+        out['longitude'] = longitude
+        for column in df.columns:
+            if column not in out:
+                out[column] = df[column]
+        return pd.DataFrame(out, index=df.index)
+
+    @staticmethod
+    def _degrees(df: pd.DataFrame):
+        """Latitude and longitude columns as float64 degrees"""
+        return tuple(
+            pd.Series(decode_coordinates(df[column].values), index=df.index).round(COORDINATE_DECIMALS)
+            for column in ('latitude', 'longitude')
+        )
+
+    @staticmethod
+    def _records_json(df: pd.DataFrame, lines: bool) -> str:
+        """Columnar JSON encoding of the rows (no per-row Python dicts)"""
+        df = VisitsSerializer.expand(df)
+        return df.to_json(
+            orient='records',
+            lines=lines,
+            date_format='iso',
+            date_unit='s',
+            double_precision=10,
+            force_ascii=False
+        )
+
+    @staticmethod
+    def json_page(df: pd.DataFrame, **extra) -> bytes:
+        """
+        The {"success", "data", "total", **extra} envelope, with the records
+        encoded straight from the columns by the pandas C encoder.
+        """
+        data = VisitsSerializer._records_json(df, lines=False)
+        tail = ''.join(f',{json.dumps(k)}:{json.dumps(v)}' for k, v in extra.items())
+        return f'{{"success":true,"data":{data},"total":{len(df)}{tail}}}'.encode('utf-8')
+
+    @staticmethod
+    def arrow_stream(df: pd.DataFrame, chunk_size: int = 65536) -> Iterator[bytes]:
+        """
+        Yield an Arrow IPC stream (schema, then one record batch per chunk).
+        Columns convert as whole arrays in their compact in-memory types
+        (place as a dictionary, no point/date strings); coordinates are
+        decoded to float64 degrees.
+        """
+        if 'latitude' in df:
+            latitude, longitude = VisitsSerializer._degrees(df)
+            df = df.assign(latitude=latitude, longitude=longitude)
+        sink = io.BytesIO()
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        with pa.ipc.new_stream(sink, schema) as writer:
+            for start in range(0, len(df), chunk_size):
+                chunk = df.iloc[start:start + chunk_size]
+                writer.write_batch(pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False))
+                yield sink.getvalue()
+                sink.seek(0)
+                sink.truncate()
+        # Schema (for an empty result) and end-of-stream marker
+        yield sink.getvalue()
+
+    @staticmethod
+    def ndjson_records(df: pd.DataFrame, chunk_size: int = 10000) -> Iterator[bytes]:
+        """Yield one JSON line per visit, encoding chunk_size rows at a time"""
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            text = VisitsSerializer._records_json(chunk, lines=True)
+            if not text.endswith('\n'):
+                text += '\n'
+            yield text.encode('utf-8')
+
+    @staticmethod
+    def ndjson_days(df: pd.DataFrame) -> Iterator[bytes]:
+        """
+        Yield one JSON line per day: {"date", "business_day", "total", "data"}.
+        Rows must be sorted by timestamp, so each day is a contiguous block.
+        """
+        if df.empty:
+            return
+        days = df['timestamp'].values.astype('datetime64[D]')
+        bounds = np.flatnonzero(days[1:] != days[:-1]) + 1
+        starts = np.concatenate(([0], bounds))
+        stops = np.concatenate((bounds, [len(df)]))
+        for start, stop in zip(starts, stops):
+            block = df.iloc[start:stop]
+            business_day = bool(block['business_day'].any()) if 'business_day' in block else None
+            header = json.dumps({
+                "date": str(days[start]),
+                "business_day": business_day,
+                "total": int(stop - start)
+            }, separators=(',', ':'))
+            data = VisitsSerializer._records_json(block, lines=False)
+            yield f'{header[:-1]},"data":{data}}}\n'.encode('utf-8')
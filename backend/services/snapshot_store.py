@@ -0,0 +1,159 @@
+"""
+Visits snapshots shared between worker processes as memory-mapped Arrow IPC files.
+"""
+import fcntl
+import json
+import logging
+import os
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+import numpy as np
+import pyarrow as pa
+
+from backend.services.visits_index import VisitsIndex
+from backend.services.spatial_index import SpatialIndex
+from backend.services.heatmap import HeatmapPyramid
+
+logger = logging.getLogger(__name__)
+
+# One uncompressed IPC file per table, so attaching maps them instead of decoding
+FRAME_FILE = 'visits.arrow'
+SPATIAL_FILE = 'spatial.arrow'
+DAYS_FILE = 'days.arrow'
+HEATMAP_FILE = 'heatmap.arrow'
+LOCK_FILE = '.lock'
+
+class SnapshotStore:
+    """
+    Directory of built snapshots, one sub-directory per dataset version.
+
+    The first process that needs a version builds it and publishes the
+    sorted frame with its spatial and day indexes and heatmap pyramid; every other process
+    maps the same files read-only, so the data sits once in the page
+    cache whatever the number of workers. A file lock makes concurrent
+    workers wait for that single build instead of repeating it.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, version: str) -> Path:
+        return self.directory / version
+
+    @contextmanager
+    def _locked(self):
+        with open(self.directory / LOCK_FILE, 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def get_or_build(self, version: str, build: Callable[[], VisitsIndex]) -> VisitsIndex:
+        """Attach to the published snapshot of `version`, building and publishing it first if needed"""
+        index = self.attach(version)
+        if index is not None:
+            return index
+        with self._locked():
+            # Another worker may have published it while we waited
+            index = self.attach(version)
+            if index is None:
+                self.publish(build())
+                self.prune(keep=version)
+                index = self.attach(version)
+        return index
+
+    def publish(self, index: VisitsIndex) -> None:
+        """Write the snapshot files, then rename the directory into place"""
+        target = self.path_for(index.version)
+        staging = self.directory / f".{index.version}.{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir()
+
+        day_starts = index.day_offsets[:-1]
+        tables = {
+            FRAME_FILE: pa.Table.from_pandas(index.df, preserve_index=False),
+            SPATIAL_FILE: pa.table({'cell_id': index.spatial.cell_ids, 'row_id': index.spatial.row_ids}),
+            DAYS_FILE: pa.Table.from_pandas(
+                index.day_summary.assign(day_number=index.day_numbers, day_start=day_starts),
+                preserve_index=False
+            ),
+            HEATMAP_FILE: self._heatmap_table(index.heatmap()),
+        }
+        for name, table in tables.items():
+            with pa.OSFile(str(staging / name), 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        os.rename(staging, target)
+        logger.info("Published visits snapshot %s to %s", index.version, target)
+
+    @staticmethod
+    def _heatmap_table(pyramid: HeatmapPyramid) -> pa.Table:
+        # Levels concatenated by ascending zoom; the rest goes in the schema metadata
+        zooms = sorted(pyramid.levels)
+        table = pa.table({
+            'zoom': np.concatenate([np.full(len(pyramid.levels[z][0]), z, dtype=np.int8) for z in zooms]),
+            'key': np.concatenate([pyramid.levels[z][0] for z in zooms]),
+            'count': np.concatenate([pyramid.levels[z][1] for z in zooms]),
+        })
+        metadata = {'first_year': pyramid.first_year, 'years': pyramid.years, 'bounds': pyramid.bounds}
+        return table.replace_schema_metadata({'heatmap': json.dumps(metadata)})
+
+    @staticmethod
+    def _restore_heatmap(table: pa.Table) -> HeatmapPyramid:
+        metadata = json.loads(table.schema.metadata[b'heatmap'])
+        zooms = table.column('zoom').to_numpy()
+        keys = table.column('key').to_numpy()
+        counts = table.column('count').to_numpy()
+        # Zero-copy slices of the mapped columns, one per zoom
+        levels = {}
+        for zoom in np.unique(zooms):
+            lo, hi = np.searchsorted(zooms, [zoom, zoom + 1])
+            levels[int(zoom)] = (keys[lo:hi], counts[lo:hi])
+        return HeatmapPyramid.restore(levels, metadata['first_year'], metadata['years'], metadata['bounds'])
+
+    @staticmethod
+    def _read(path: Path) -> pa.Table:
+        return pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+
+    def attach(self, version: str) -> Optional[VisitsIndex]:
+        """Map a published snapshot, None when this version was not published"""
+        path = self.path_for(version)
+        if not (path / FRAME_FILE).exists():
+            return None
+        df = self._read(path / FRAME_FILE).to_pandas(split_blocks=True)
+        spatial = self._read(path / SPATIAL_FILE)
+        days = self._read(path / DAYS_FILE).to_pandas(split_blocks=True)
+
+        day_offsets = np.append(days.pop('day_start').values, len(df)).astype('int64')
+        day_numbers = days.pop('day_number').values
+        index = VisitsIndex.restore(
+            df,
+            version=version,
+            spatial=SpatialIndex.restore(
+                df['latitude'].values,
+                df['longitude'].values,
+                spatial.column('cell_id').to_numpy(),
+                spatial.column('row_id').to_numpy()
+            ),
+            day_numbers=day_numbers,
+            day_offsets=day_offsets,
+            day_summary=days,
+            # Snapshots published before the pyramid was shared build their own on first use
+            heatmap=self._restore_heatmap(self._read(path / HEATMAP_FILE)) if (path / HEATMAP_FILE).exists() else None
+        )
+        logger.info("Attached visits snapshot %s (%d rows)", version, len(index))
+        return index
+
+    def prune(self, keep: str) -> None:
+        """
+        Remove the other versions and leftover staging directories (called
+        under the lock). Processes still mapping an old version keep their
+        pages until they swap, unlinking does not affect existing maps.
+        """
+        for path in self.directory.iterdir():
+            if path.is_dir() and path.name != keep:
+                shutil.rmtree(path, ignore_errors=True)
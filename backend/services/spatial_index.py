@@ -0,0 +1,87 @@
+"""
+Uniform grid index over visit coordinates for bounding-box and radius queries.
+"""
+import numpy as np
+
+from backend.services.geo import decode_coordinates, haversine_m, METERS_PER_DEGREE
+
+class SpatialIndex:
+    """
+    Buckets rows into square lat/lon cells of cell_size degrees.
+
+    Row ids are sorted by cell, so each grid row of a query box is one
+    contiguous run found by binary search; candidates are then checked
+    against the exact box or radius. The coordinates are kept as given
+    (scaled int32 from the visits index) and only candidates are decoded.
+    """
+
+    def __init__(self, latitude: np.ndarray, longitude: np.ndarray, cell_size: float = 0.01):
+        self.cell_size = cell_size
+        self.n_cols = int(np.ceil(360 / cell_size)) + 1
+        self.latitude = np.asarray(latitude)
+        self.longitude = np.asarray(longitude)
+
+        latitude, longitude = decode_coordinates(self.latitude), decode_coordinates(self.longitude)
+        rows = np.flatnonzero(np.isfinite(latitude) & np.isfinite(longitude))
+        cells = self._cells(latitude[rows], longitude[rows])
+        order = np.argsort(cells, kind='stable')
+        self.cell_ids = cells[order]
+        self.row_ids = rows[order].astype(np.int64)
+
+    @classmethod
+    def restore(
+        cls,
+        latitude: np.ndarray,
+        longitude: np.ndarray,
+        cell_ids: np.ndarray,
+        row_ids: np.ndarray,
+        cell_size: float = 0.01
+    ) -> 'SpatialIndex':
+        """Rebuild the index around already sorted cell/row ids (e.g. from a shared snapshot)"""
+        index = cls.__new__(cls)
+        index.cell_size = cell_size
+        index.n_cols = int(np.ceil(360 / cell_size)) + 1
+        index.latitude = np.asarray(latitude)
+        index.longitude = np.asarray(longitude)
+        index.cell_ids = cell_ids
+        index.row_ids = row_ids
+        return index
+
+    def _grid(self, latitude, longitude):
+        grid_row = np.floor((np.asarray(latitude, dtype=np.float64) + 90) / self.cell_size).astype(np.int64)
+        grid_col = np.floor((np.asarray(longitude, dtype=np.float64) + 180) / self.cell_size).astype(np.int64)
+        return grid_row, grid_col
+
+    def _cells(self, latitude, longitude) -> np.ndarray:
+        grid_row, grid_col = self._grid(latitude, longitude)
+        return grid_row * self.n_cols + grid_col
+
+    def _candidates(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Row ids of every cell overlapping the box"""
+        min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0)
+        min_lon, max_lon = max(min_lon, -180.0), min(max_lon, 180.0)
+        (row0, row1), (col0, col1) = self._grid([min_lat, max_lat], [min_lon, max_lon])
+        runs = []
+        for grid_row in range(int(row0), int(row1) + 1):
+            lo = np.searchsorted(self.cell_ids, grid_row * self.n_cols + col0, side='left')
+            hi = np.searchsorted(self.cell_ids, grid_row * self.n_cols + col1, side='right')
+            if hi > lo:
+                runs.append(self.row_ids[lo:hi])
+        return np.concatenate(runs) if runs else np.empty(0, dtype=np.int64)
+
+    def bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Sorted row ids inside the box (edges included)"""
+        rows = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        lat, lon = decode_coordinates(self.latitude[rows]), decode_coordinates(self.longitude[rows])
+        inside = (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+        return np.sort(rows[inside])
+
+    def radius(self, latitude: float, longitude: float, radius_m: float) -> np.ndarray:
+        """Sorted row ids within radius_m meters of (latitude, longitude)"""
+        dlat = radius_m / METERS_PER_DEGREE
+        dlon = radius_m / (METERS_PER_DEGREE * max(np.cos(np.radians(latitude)), 1e-6))
+        rows = self._candidates(latitude - dlat, longitude - dlon, latitude + dlat, longitude + dlon)
+        distance = haversine_m(
+            latitude, longitude, decode_coordinates(self.latitude[rows]), decode_coordinates(self.longitude[rows])
+        )
+        return np.sort(rows[distance <= radius_m])
@@ -0,0 +1,228 @@
+"""
+In-memory, date-sorted index over the visits DataFrame.
+"""
+import threading
+import numpy as np
+import pandas as pd
+from typing import Optional, Any, Tuple
+
+from backend.services.geo import encode_coordinates
+from backend.services.place_index import PlaceIndex
+from backend.services.spatial_index import SpatialIndex
+from backend.services.day_summary import DaySummary
+from backend.services.heatmap import HeatmapPyramid
+
+
+# Redundant text columns dropped at load and rebuilt on output
+DERIVED_COLUMNS = ('point', 'date')
+
+
+def compact_visits(df: pd.DataFrame, timestamps: pd.Series) -> pd.DataFrame:
+    """
+    Compact in-memory layout of the visits: datetime64 timestamps, place as
+    a categorical, int32 coordinates scaled by 1e7 (see geo.encode_coordinates)
+    and a bool business_day. The "lat,lon" point and date strings are dropped
+    (see DERIVED_COLUMNS).
+    """
+    # Coordinates come from the "lat,lon" point string when not already split
+    if 'latitude' not in df.columns and 'point' in df.columns:
+        coordinates = df['point'].str.split(',', expand=True).astype(float)
+        df = df.assign(latitude=coordinates[0], longitude=coordinates[1])
+
+    columns = {
+        'timestamp': timestamps,
+        'place': df['place'].astype('category'),
+        'latitude': encode_coordinates(pd.to_numeric(df['latitude'], errors='coerce')),
+        'longitude': encode_coordinates(pd.to_numeric(df['longitude'], errors='coerce')),
+    }
+    if 'business_day' in df.columns:
+        business_day = df['business_day']
+        if business_day.dtype != bool:
+            business_day = business_day.astype(str).str.lower().isin(('true', '1'))
+        columns['business_day'] = business_day.values
+    for column in df.columns:
+        if column not in columns and column not in DERIVED_COLUMNS:
+            columns[column] = df[column]
+    return pd.DataFrame(columns, index=df.index)
+
+
+def to_day_number(value: Any) -> int:
+    """Convert a date, datetime or ISO string to days since the epoch"""
+    return int(np.datetime64(pd.Timestamp(value).date(), 'D').astype('int64'))
+
+
+class VisitsIndex:
+    """
+    Visits parsed once and sorted by timestamp, with a date -> row-range index.
+
+    Every day present in the data maps to a contiguous block of rows, so a
+    single-day or date-range lookup is a binary search over the distinct
+    days followed by a zero-copy slice of the sorted frame.
+    """
+
+    def __init__(self, df: pd.DataFrame, version: str = ''):
+        # Identifies the loaded data; part of every cache key and ETag
+        self.version = version
+        self._memory_usage = None
+        self._heatmap = None
+        self._heatmap_lock = threading.Lock()
+
+        # Always parse as datetime and remove timezone info
+        timestamps = pd.to_datetime(df['timestamp'], errors='coerce')
+        if timestamps.dt.tz is not None:
+            timestamps = timestamps.dt.tz_localize(None)
+
+        if timestamps.isnull().any():
+            raise ValueError("Some timestamps could not be parsed.")
+
+        # Place names repeat massively: keep them dictionary-encoded, and keep
+        # every other column in its most compact type
+        df = compact_visits(df, timestamps)
+        df = df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+        self.df = df
+        self._index_places()
+
+        # Grid buckets over the coordinates for viewport and radius queries
+        self.spatial = SpatialIndex(df['latitude'].values, df['longitude'].values)
+
+        # Day number (days since epoch) of every row, sorted ascending
+        row_days = df['timestamp'].values.astype('datetime64[D]').astype('int64')
+
+        # Distinct days and the row offset where each one starts; the extra
+        # trailing offset closes the last block
+        self.day_numbers, starts = np.unique(row_days, return_index=True)
+        self.day_offsets = np.append(starts, len(df)).astype('int64')
+
+        # Per-day aggregates, aligned with day_numbers
+        self.day_summary = DaySummary.build(self)
+
+    def _index_places(self) -> None:
+        # Substring index over the distinct places; row codes are shifted by
+        # one so missing places (code -1) map to slot 0 of a lookup table
+        self.places = PlaceIndex(self.df['place'].cat.categories)
+        self.place_keys = self.df['place'].cat.codes.values.astype(np.int32) + 1
+
+    @classmethod
+    def restore(
+        cls,
+        df: pd.DataFrame,
+        version: str,
+        spatial: SpatialIndex,
+        day_numbers: np.ndarray,
+        day_offsets: np.ndarray,
+        day_summary: pd.DataFrame,
+        heatmap: Optional[HeatmapPyramid] = None
+    ) -> 'VisitsIndex':
+        """Reassemble an index from a compact, sorted frame and its prebuilt indexes"""
+        index = cls.__new__(cls)
+        index.version = version
+        index._memory_usage = None
+        index._heatmap = heatmap
+        index._heatmap_lock = threading.Lock()
+        index.df = df
+        index._index_places()
+        index.spatial = spatial
+        index.day_numbers = day_numbers
+        index.day_offsets = day_offsets
+        index.day_summary = day_summary
+        return index
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def memory_usage(self) -> int:
+        """
+        Bytes held by the frame and the derived indexes, heatmap pyramid
+        included once built (computed once, snapshots are immutable)
+        """
+        if self._memory_usage is None:
+            arrays = [
+                self.place_keys, self.day_numbers, self.day_offsets,
+                self.spatial.cell_ids, self.spatial.row_ids
+            ]
+            self._memory_usage = int(
+                self.df.memory_usage(deep=True).sum()
+                + self.day_summary.memory_usage(deep=True).sum()
+                + sum(a.nbytes for a in arrays)
+            )
+        return self._memory_usage + (self._heatmap.memory_usage() if self._heatmap is not None else 0)
+
+    def heatmap(self) -> HeatmapPyramid:
+        """Density tile pyramid of the whole snapshot, built on first use"""
+        with self._heatmap_lock:
+            if self._heatmap is None:
+                self._heatmap = HeatmapPyramid(self.df)
+            return self._heatmap
+
+    def day_range(
+        self,
+        start_date: Optional[Any] = None,
+        end_date: Optional[Any] = None
+    ) -> Tuple[int, int]:
+        """Return the [start, stop) range of day positions covering the given dates (inclusive)"""
+        lo = 0
+        hi = len(self.day_numbers)
+        if start_date is not None:
+            lo = int(np.searchsorted(self.day_numbers, to_day_number(start_date), side='left'))
+        if end_date is not None:
+            hi = int(np.searchsorted(self.day_numbers, to_day_number(end_date), side='right'))
+        return (lo, hi) if lo < hi else (0, 0)
+
+    def row_range(
+        self,
+        start_date: Optional[Any] = None,
+        end_date: Optional[Any] = None
+    ) -> Tuple[int, int]:
+        """Return the [start, stop) row range covering the given dates (inclusive)"""
+        lo, hi = self.day_range(start_date, end_date)
+        if lo >= hi:
+            return 0, 0
+        return int(self.day_offsets[lo]), int(self.day_offsets[hi])
+
+    def first_row_at(self, timestamp: int) -> int:
+        """First row whose timestamp (ns since the epoch) is not before `timestamp`"""
+        return int(np.searchsorted(self.df['timestamp'].values, np.datetime64(timestamp, 'ns'), side='left'))
+
+    def row_after(self, timestamp: int, row: int, version: str, tie: int = 1) -> int:
+        """
+        First row after a page cursor. Within the same snapshot that is the
+        next row id; cursors from an older snapshot resume at their
+        timestamp (binary search on the sorted column) past the `tie` rows
+        with that timestamp that were already served. Rows that a reload
+        inserts among equal timestamps can shift that count.
+        """
+        if version == self.version:
+            return min(row + 1, len(self.df))
+        first = self.first_row_at(timestamp)
+        timestamps = self.df['timestamp'].values
+        last = int(np.searchsorted(timestamps, np.datetime64(timestamp, 'ns'), side='right'))
+        return min(first + tie, last)
+
+    def day_start(self, row: int) -> int:
+        """First row of the day containing `row`"""
+        day = int(np.searchsorted(self.day_offsets, row, side='right')) - 1
+        return int(self.day_offsets[max(day, 0)])
+
+    def days(
+        self,
+        start_date: Optional[Any] = None,
+        end_date: Optional[Any] = None
+    ) -> pd.DataFrame:
+        """Return the per-day summary rows between start_date and end_date (inclusive)"""
+        lo, hi = self.day_range(start_date, end_date)
+        return self.day_summary.iloc[lo:hi]
+
+    def place_rows(self, place: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Positions (relative to start) of the rows in [start, stop) whose place contains `place`"""
+        matched = np.zeros(len(self.places) + 1, dtype=bool)
+        matched[self.places.match_codes(place) + 1] = True
+        return np.flatnonzero(matched[self.place_keys[start:stop]])
+
+    def slice(
+        self,
+        start_date: Optional[Any] = None,
+        end_date: Optional[Any] = None
+    ) -> pd.DataFrame:
+        """Return the rows between start_date and end_date (inclusive) without copying"""
+        start, stop = self.row_range(start_date, end_date)
+        return self.df.iloc[start:stop]
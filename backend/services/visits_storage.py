@@ -0,0 +1,171 @@
+"""
+Storage layer for the visits dataset: CSV or Parquet selected by file extension.
+"""
+import hashlib
+from pathlib import Path
+from typing import Optional, Any
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+# Hive partition columns of the Parquet layout (year=2014/month=6/part-0.parquet)
+PARTITION_COLUMNS = ['year', 'month']
+
+class VisitsStorage:
+    @staticmethod
+    def is_parquet(path: Path) -> bool:
+        """Parquet is a *.parquet file or a partitioned dataset directory"""
+        path = Path(path)
+        return path.suffix == '.parquet' or path.is_dir()
+
+    @staticmethod
+    def version(path: Path) -> str:
+        """
+        Short fingerprint of the data on disk (paths, sizes and mtimes), used
+        to version caches and ETags.
+        """
+        path = Path(path)
+        files = sorted(path.rglob('*.parquet')) if path.is_dir() else [path]
+        digest = hashlib.sha1()
+        for file in files:
+            stat = file.stat()
+            digest.update(f"{file}:{stat.st_size}:{stat.st_mtime_ns};".encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    @staticmethod
+    def load(
+        path: Path,
+        start_date: Optional[Any] = None,
+        end_date: Optional[Any] = None,
+        place: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Load the visits dataset, restricted to [start_date, end_date] and
+        places containing `place` when given.
+        """
+        if VisitsStorage.is_parquet(path):
+            return VisitsStorage.read_parquet(path, start_date, end_date, place)
+        return VisitsStorage.read_csv(path, start_date, end_date, place)
+
+    @staticmethod
+    def read_csv(
+        path: Path,
+        start_date: Optional[Any] = None,
+        end_date: Optional[Any] = None,
+        place: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Read the CSV and apply the filters after parsing (no pushdown possible)"""
+        df = pd.read_csv(path)
+        if start_date is None and end_date is None and not place:
+            return df
+
+        mask = pd.Series(True, index=df.index)
+        if start_date is not None or end_date is not None:
+            days = pd.to_datetime(df['timestamp'], errors='coerce').dt.normalize()
+            if start_date is not None:
+                mask &= days >= pd.Timestamp(start_date)
+            if end_date is not None:
+                mask &= days <= pd.Timestamp(end_date)
+        if place:
+            mask &= df['place'].str.contains(place, case=False, na=False, regex=False)
+        return df[mask].reset_index(drop=True)
+
+    @staticmethod
+    def read_parquet(
+        path: Path,
+        start_date: Optional[Any] = None,
+        end_date: Optional[Any] = None,
+        place: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Read a (year/month partitioned) Parquet dataset through a memory map.
+
+        Date bounds prune whole partitions and, through the timestamp column
+        statistics, row groups; the place filter is evaluated by the scanner
+        so non-matching rows never reach pandas.
+        """
+        dataset = ds.dataset(
+            str(path),
+            format='parquet',
+            partitioning='hive',
+            filesystem=fs.LocalFileSystem(use_mmap=True)
+        )
+        expression = VisitsStorage.build_filter(dataset.schema, start_date, end_date, place)
+        table = dataset.to_table(filter=expression)
+
+        partition_columns = [c for c in PARTITION_COLUMNS if c in table.column_names]
+        if partition_columns:
+            table = table.drop_columns(partition_columns)
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    @staticmethod
+    def timestamp_bound(schema: pa.Schema, value: pd.Timestamp) -> pa.Scalar:
+        """
+        Naive day bound as a scalar of the timestamp column's type; for a
+        tz-aware column the bound is taken in the column's time zone.
+        """
+        column = schema.field('timestamp').type if 'timestamp' in schema.names else None
+        if column is None or not pa.types.is_timestamp(column):
+            raise ValueError(f"Cannot filter by date: the timestamp column is {column}, expected a timestamp type")
+        if column.tz is not None:
+            value = value.tz_localize(column.tz)
+        return pa.scalar(value.to_pydatetime(), type=column)
+
+    @staticmethod
+    def build_filter(
+        schema: pa.Schema,
+        start_date: Optional[Any] = None,
+        end_date: Optional[Any] = None,
+        place: Optional[str] = None
+    ) -> Optional[ds.Expression]:
+        """Build the dataset filter expression for the given bounds"""
+        expression = None
+
+        def combine(condition):
+            nonlocal expression
+            expression = condition if expression is None else expression & condition
+
+        partitioned = all(c in schema.names for c in PARTITION_COLUMNS)
+        if start_date is not None:
+            start = pd.Timestamp(start_date).normalize()
+            if partitioned:
+                year, month = ds.field('year'), ds.field('month')
+                combine((year > start.year) | ((year == start.year) & (month >= start.month)))
+            combine(ds.field('timestamp') >= VisitsStorage.timestamp_bound(schema, start))
+        if end_date is not None:
+            end = pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1)
+            last = end - pd.Timedelta(days=1)
+            if partitioned:
+                year, month = ds.field('year'), ds.field('month')
+                combine((year < last.year) | ((year == last.year) & (month <= last.month)))
+            combine(ds.field('timestamp') < VisitsStorage.timestamp_bound(schema, end))
+        if place:
+            combine(pc.match_substring(ds.field('place'), place, ignore_case=True))
+        return expression
+
+    @staticmethod
+    def write_parquet(df: pd.DataFrame, path: Path, max_rows_per_group: int = 64 * 1024) -> None:
+        """
+        Write visits as zstd Parquet partitioned by year/month, sorted by
+        timestamp so row group statistics make date pruning effective.
+        Partitions present in `df` are replaced, the others are kept.
+        """
+        df = df.assign(timestamp=pd.to_datetime(df['timestamp'])).sort_values('timestamp', kind='stable')
+        df = df.assign(
+            year=df['timestamp'].dt.year.astype('int16'),
+            month=df['timestamp'].dt.month.astype('int8')
+        )
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        ds.write_dataset(
+            table,
+            str(path),
+            format='parquet',
+            partitioning=ds.partitioning(table.select(PARTITION_COLUMNS).schema, flavor='hive'),
+            file_options=ds.ParquetFileFormat().make_write_options(compression='zstd'),
+            basename_template='part-{i}.parquet',
+            existing_data_behavior='delete_matching',
+            max_rows_per_group=max_rows_per_group,
+            min_rows_per_group=min(max_rows_per_group, 1024)
+        )
@@ -0,0 +1,108 @@
+"""
+Bounded thread pool for the CPU-bound parts of request handling.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Iterable, Optional
+
+
+class PoolSaturated(Exception):
+    """Every worker is busy and the queue is full"""
+
+
+class WorkerPool:
+    """
+    Runs blocking work (filtering, serialization) off the event loop.
+
+    Threads rather than processes: they share the in-memory snapshot, and
+    NumPy/pandas release the GIL in their heavy loops. At most
+    max_workers + max_queue jobs are admitted; beyond that run() raises
+    PoolSaturated immediately so the caller can shed load.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 32, timeout: Optional[float] = 30):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="visits-worker")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self.pending -= 1
+        self._slots.release()
+
+    def _admit(self) -> None:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated()
+        with self._lock:
+            self.pending += 1
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) in the pool; raises PoolSaturated or asyncio.TimeoutError"""
+        self._admit()
+
+        # The slot is freed when the job really ends, not when the caller gives up
+        future = self._executor.submit(partial(fn, *args, **kwargs))
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise
+
+    def stream(self, chunks: Iterable[bytes]) -> AsyncIterator[bytes]:
+        """
+        Produce the chunks of a blocking generator in the pool, one at a time.
+
+        The stream holds one slot from this call (which raises PoolSaturated,
+        before any response has started) until it ends; each chunk is bounded
+        by the timeout, and a chunk that exceeds it ends the stream with
+        asyncio.TimeoutError.
+        """
+        self._admit()
+        return self._stream(iter(chunks))
+
+    async def _stream(self, chunks) -> AsyncIterator[bytes]:
+        done = object()
+        future = None
+        try:
+            while True:
+                future = self._executor.submit(next, chunks, done)
+                try:
+                    chunk = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+                except asyncio.TimeoutError:
+                    with self._lock:
+                        self.timeouts += 1
+                    raise
+                if chunk is done:
+                    return
+                yield chunk
+        finally:
+            # As in run(): the slot is freed when the running chunk really ends
+            if future is not None and not future.done():
+                future.add_done_callback(self._release)
+            else:
+                self._release(None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "pending": self.pending,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
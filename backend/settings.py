@@ -25,6 +25,27 @@ class Settings:
         # Data settings
         self.data_file_path = os.getenv('DATA_FILE_PATH', 'data/visitas_business_days.csv')
         self.max_records_per_request = int(os.getenv('MAX_RECORDS_PER_REQUEST', '1000'))
+        # Optional load window (YYYY-MM-DD), pushed down to Parquet partitions/row groups
+        self.data_start_date = os.getenv('DATA_START_DATE')
+        self.data_end_date = os.getenv('DATA_END_DATE')
+        # Seconds between checks of the data file for changes (0 disables hot reload)
+        self.data_watch_interval = float(os.getenv('DATA_WATCH_INTERVAL', '30'))
+        # Directory (ideally on tmpfs, e.g. /dev/shm/visits) where the built dataset
+        # is published as memory-mapped Arrow files shared by all uvicorn workers
+        self.shared_snapshot_dir = os.getenv('SHARED_SNAPSHOT_DIR')
+        # Required in the X-Admin-Token header of /admin/* endpoints, which are disabled without it
+        self.admin_token = os.getenv('ADMIN_TOKEN')
+        
+        # Worker pool for CPU-bound request work
+        self.worker_threads = int(os.getenv('WORKER_THREADS', str(min(8, os.cpu_count() or 1))))
+        self.worker_queue_size = int(os.getenv('WORKER_QUEUE_SIZE', '32'))
+        self.request_timeout = float(os.getenv('REQUEST_TIMEOUT', '30'))
+        
+        # Google Routes API (road distances between stops); the base URL can point to a stub
+        self.google_routes_api_key = os.getenv('GOOGLE_ROUTES_API_KEY')
+        self.google_routes_base_url = os.getenv('GOOGLE_ROUTES_BASE_URL', 'https://routes.googleapis.com')
+        self.google_routes_cache = os.getenv('GOOGLE_ROUTES_CACHE', 'data/routes_cache.sqlite')
+        self.google_routes_concurrency = int(os.getenv('GOOGLE_ROUTES_CONCURRENCY', '4'))
         
         # CORS settings
         self.allowed_origins = os.getenv('ALLOWED_ORIGINS', '["http://localhost:8501", "http://frontend:8501"]')
@@ -42,6 +63,7 @@ class Settings:
         # Cache settings
         self.cache_enabled = os.getenv('CACHE_ENABLED', 'true').lower() == 'true'
         self.cache_ttl = int(os.getenv('CACHE_TTL', '300'))
+        self.cache_max_entries = int(os.getenv('CACHE_MAX_ENTRIES', '1024'))
         
         # Logging settings
         self.log_level = os.getenv('LOG_LEVEL', 'INFO')
@@ -57,6 +79,12 @@ class Settings:
         backend_dir = Path(__file__).parent
         return backend_dir / self.data_file_path
     
+    def get_google_routes_cache_path(self) -> Path:
+        """Routes cache database, relative paths resolved against the backend directory"""
+        if os.path.isabs(self.google_routes_cache):
+            return Path(self.google_routes_cache)
+        return Path(__file__).parent / self.google_routes_cache
+    
     def validate_settings(self) -> List[str]:
         """Validate settings and return list of warnings"""
         warnings = []
@@ -68,12 +96,5 @@ class Settings:
         
         return warnings
 
-# Create global settings instance
+# Create global settings instance (validated by the app at startup, not on import)
 settings = Settings()
-
-# Validate settings on import
-warnings = settings.validate_settings()
-if warnings:
-    print("Settings warnings:")
-    for warning in warnings:
-        print(f"  ⚠️  {warning}")
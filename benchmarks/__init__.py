@@ -0,0 +1,7 @@
+"""
+Reproducible benchmarks for the visits backend, on synthetic data.
+
+    python -m benchmarks.synthetic --days 3650 --output /tmp/visits.csv
+    python -m benchmarks --days 3650 --save-baseline
+    python -m benchmarks --days 3650 --threshold 0.2
+"""
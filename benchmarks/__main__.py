@@ -0,0 +1,89 @@
+"""
+Run the benchmark suite and compare it with a stored baseline.
+"""
+import argparse
+import json
+import resource
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.synthetic import generate_visits
+from benchmarks.micro import run_micro
+from benchmarks.load import run_load
+
+DEFAULT_BASELINE = Path(__file__).parent / 'baseline.json'
+# Lower is better for every metric except these
+HIGHER_IS_BETTER = {'throughput_rps'}
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def flatten(results: dict, prefix: str = '') -> dict:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)):
+            flat[name] = float(value)
+    return flat
+
+def regressions(current: dict, baseline: dict, threshold: float) -> list:
+    """Metrics worse than the baseline by more than threshold (relative)"""
+    found = []
+    for name, base in flatten(baseline).items():
+        value = flatten(current).get(name)
+        if value is None or base == 0 or name.split('.')[-1] in ('requests', 'concurrency', 'errors', 'rows'):
+            continue
+        change = (value - base) / base
+        if name.split('.')[-1] in HIGHER_IS_BETTER:
+            change = -change
+        if change > threshold:
+            found.append((name, base, value, change))
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the visits backend on synthetic data")
+    parser.add_argument('--days', type=int, default=3650)
+    parser.add_argument('--visits-per-day', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=50, help="Repetitions per micro-benchmark")
+    parser.add_argument('--requests', type=int, default=2000, help="Requests in the load test (0 skips it)")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    args = parser.parse_args()
+    # Nothing to compare against is a failure, not a silent pass; checked before the run
+    if not args.save_baseline and not args.baseline.exists():
+        parser.error(f"no baseline at {args.baseline}; run with --save-baseline first")
+
+    df = generate_visits(args.days, args.visits_per_day, seed=args.seed)
+    results = {"rows": len(df), "micro": run_micro(df, args.repeat, args.seed)}
+
+    if args.requests:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = Path(tmp) / 'visits.csv'
+            df.to_csv(data_path, index=False)
+            del df
+            results["load"] = run_load(data_path, args.requests, args.concurrency, args.seed)
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    print(json.dumps(results, indent=2))
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    found = regressions(results, json.loads(args.baseline.read_text()), args.threshold)
+    for name, base, value, change in found:
+        print(f"REGRESSION {name}: {base:.3f} -> {value:.3f} ({change:+.0%})")
+    if found:
+        sys.exit(1)
+    print(f"No regression above {args.threshold:.0%} against {args.baseline}")
+
+if __name__ == '__main__':
+    main()
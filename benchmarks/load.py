@@ -0,0 +1,65 @@
+"""
+In-process load test of the FastAPI app (ASGI transport, no network).
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+
+async def _load(data_path: Path, requests: int, concurrency: int, seed: int) -> Dict[str, float]:
+    # Settings are read at import time
+    os.environ['DATA_FILE_PATH'] = str(data_path)
+    os.environ.setdefault('DATA_WATCH_INTERVAL', '0')
+    import httpx
+    from backend.main import app
+    # One INFO line per request would dominate the measurement
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    async with app.router.lifespan_context(app):
+        # The dataset loads in the background after startup
+        dataset = app.state.dataset
+        while dataset.current is None:
+            if dataset.error and dataset.stage is None:
+                raise RuntimeError(f"Loading {data_path} failed: {dataset.error}")
+            await asyncio.sleep(0.05)
+        index = dataset.current
+        dates = [str(d) for d in index.day_numbers.astype('datetime64[D]')]
+        rng = random.Random(seed)
+        latencies: List[float] = []
+        errors = 0
+        queue: asyncio.Queue = asyncio.Queue()
+        for _ in range(requests):
+            queue.put_nowait(rng.choice(dates))
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def worker():
+                nonlocal errors
+                while not queue.empty():
+                    day = queue.get_nowait()
+                    start = time.perf_counter()
+                    resp = await client.get("/api/visits", params={"end_date": day})
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    if resp.status_code != 200:
+                        errors += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": requests / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+def run_load(data_path: Path, requests: int = 2000, concurrency: int = 16, seed: int = 0) -> Dict[str, float]:
+    return asyncio.run(_load(data_path, requests, concurrency, seed))
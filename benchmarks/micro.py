@@ -0,0 +1,51 @@
+"""
+Micro-benchmarks of the index, filter and serialization paths.
+"""
+import time
+from typing import Callable, Dict
+import numpy as np
+import pandas as pd
+
+from backend.services.visits_index import VisitsIndex
+from backend.services.filtering_visits import FilteringVisits
+from backend.services.serializers import VisitsSerializer
+
+def measure(fn: Callable[[], object], repeat: int = 50, warmup: int = 3) -> Dict[str, float]:
+    """Median and p95 wall time of fn(), in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": float(np.median(samples)), "p95_ms": float(np.percentile(samples, 95))}
+
+def run_micro(df: pd.DataFrame, repeat: int = 50, seed: int = 0) -> Dict[str, Dict[str, float]]:
+    rng = np.random.default_rng(seed)
+    results = {}
+
+    start = time.perf_counter()
+    index = VisitsIndex(df)
+    elapsed = (time.perf_counter() - start) * 1000
+    results["index_build"] = {"median_ms": elapsed, "p95_ms": elapsed}
+
+    days = pd.to_datetime(index.day_numbers.astype('datetime64[D]'))
+    place = str(index.df['place'].iloc[len(index.df) // 2])[:8]
+
+    def random_day():
+        return days[rng.integers(len(days))].date()
+
+    results["select_day"] = measure(lambda: FilteringVisits.select(
+        index, start_date=(d := random_day()), end_date=d), repeat)
+    results["select_month"] = measure(lambda: FilteringVisits.select(
+        index, start_date=(d := random_day()), end_date=d + pd.Timedelta(days=30)), repeat)
+    results["select_place_all"] = measure(lambda: FilteringVisits.select(index, place=place), repeat)
+    results["select_day_simplified"] = measure(lambda: FilteringVisits.select(
+        index, start_date=(d := random_day()), end_date=d, zoom=14), repeat)
+
+    page = FilteringVisits.select(index, limit=1000)
+    results["json_page_1000"] = measure(lambda: VisitsSerializer.json_page(page), repeat)
+    results["arrow_page_1000"] = measure(lambda: b''.join(VisitsSerializer.arrow_stream(page)), repeat)
+    results["day_summary_all"] = measure(lambda: index.days(), repeat)
+    return results
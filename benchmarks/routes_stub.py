@@ -0,0 +1,66 @@
+"""
+Local stand-in for the Google Routes computeRouteMatrix endpoint.
+
+    uvicorn benchmarks.routes_stub:app --port 8090
+    GOOGLE_ROUTES_BASE_URL=http://localhost:8090 GOOGLE_ROUTES_API_KEY=stub python -m backend.routes ...
+
+Distances are the great-circle distance times ROUTES_STUB_DETOUR at
+ROUTES_STUB_SPEED_KMH; ROUTES_STUB_FAILURE_RATE of the requests answer
+503 to exercise the client retries.
+"""
+import os
+import random
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from backend.services.geo import haversine_m
+
+DETOUR = float(os.getenv('ROUTES_STUB_DETOUR', '1.3'))
+SPEED_KMH = float(os.getenv('ROUTES_STUB_SPEED_KMH', '25'))
+FAILURE_RATE = float(os.getenv('ROUTES_STUB_FAILURE_RATE', '0'))
+MAX_ELEMENTS = 625
+
+app = FastAPI(title="Routes API stub")
+app.state.requests = 0
+app.state.elements = 0
+
+def _lat_lng(waypoint: dict):
+    lat_lng = waypoint['waypoint']['location']['latLng']
+    return lat_lng['latitude'], lat_lng['longitude']
+
+@app.post("/distanceMatrix/v2:computeRouteMatrix")
+async def compute_route_matrix(request: Request, x_goog_api_key: str = Header(None)):
+    if not x_goog_api_key:
+        raise HTTPException(status_code=403, detail="API key missing")
+    if random.random() < FAILURE_RATE:
+        return JSONResponse(status_code=503, content={"error": "unavailable"})
+    body = await request.json()
+    origins = [_lat_lng(w) for w in body['origins']]
+    destinations = [_lat_lng(w) for w in body['destinations']]
+    if len(origins) * len(destinations) > MAX_ELEMENTS:
+        raise HTTPException(status_code=400, detail="Too many elements")
+    app.state.requests += 1
+    app.state.elements += len(origins) * len(destinations)
+
+    elements = []
+    for i, (o_lat, o_lon) in enumerate(origins):
+        for j, (d_lat, d_lon) in enumerate(destinations):
+            meters = float(haversine_m(o_lat, o_lon, d_lat, d_lon)) * DETOUR
+            element = {
+                "status": {},
+                "condition": "ROUTE_EXISTS",
+                "distanceMeters": int(meters),
+                "duration": f"{int(meters / (SPEED_KMH / 3.6))}s"
+            }
+            # Like the real API (proto3 JSON), zero indexes are omitted
+            if i:
+                element["originIndex"] = i
+            if j:
+                element["destinationIndex"] = j
+            elements.append(element)
+    random.shuffle(elements)
+    return elements
+
+@app.get("/stats")
+async def stats():
+    return {"requests": app.state.requests, "elements": app.state.elements}
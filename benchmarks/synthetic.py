@@ -0,0 +1,86 @@
+"""
+Synthetic visits generator with the real schema:
+timestamp, point, place, date, latitude, longitude, business_day.
+"""
+import argparse
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# Around Bogotá, like the real data
+CENTER = (4.65, -74.1)
+SPREAD_DEGREES = 0.15
+
+def generate_visits(
+    days: int = 3650,
+    visits_per_day: int = 60,
+    places: int = 500,
+    start: str = '2014-01-01',
+    seed: int = 0
+) -> pd.DataFrame:
+    """
+    Generate `days` days of visits (Poisson(visits_per_day) per day) over a
+    Zipf-like distribution of `places` named sites, sorted by timestamp.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days, freq='D')
+
+    counts = rng.poisson(visits_per_day, size=days)
+    total = int(counts.sum())
+    day_of_row = np.repeat(np.arange(days), counts)
+    first_row = np.repeat(np.cumsum(counts) - counts, counts)
+
+    # Visits start at 06:00 and advance by up to 20 minutes, all within 16 hours
+    max_gap = np.minimum(1200, 16 * 3600 // np.maximum(counts, 1))
+    gaps = rng.integers(1, np.repeat(max_gap, counts) + 1)
+    cumulative = np.cumsum(gaps)
+    seconds = cumulative - cumulative[first_row] + gaps[first_row]
+    timestamps = dates.values[day_of_row] + np.timedelta64(6, 'h') + seconds.astype('timedelta64[s]')
+
+    # Popular places are visited far more often, and often several times in a row
+    weights = 1.0 / np.arange(1, places + 1)
+    place_ids = rng.choice(places, size=total, p=weights / weights.sum())
+    repeat = rng.random(total) < 0.4
+    repeat[first_row == np.arange(total)] = False
+    source = np.maximum.accumulate(np.where(repeat, 0, np.arange(total)))
+    place_ids = place_ids[source]
+
+    place_lat = CENTER[0] + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES, size=places)
+    place_lon = CENTER[1] + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES, size=places)
+    place_names = np.array([f"Sitio {i} - Calle {10 + i % 170} # {i % 90}-{i % 50}, Bogotá" for i in range(places)])
+    latitude = place_lat[place_ids] + rng.normal(0, 1e-4, size=total)
+    longitude = place_lon[place_ids] + rng.normal(0, 1e-4, size=total)
+
+    # Weekdays are business days except for ~5% holidays
+    business = (dates.dayofweek < 5) & (rng.random(days) > 0.05)
+
+    df = pd.DataFrame({
+        'timestamp': pd.DatetimeIndex(timestamps).strftime('%Y-%m-%d %H:%M:%S'),
+        'point': pd.Series(latitude).astype(str) + ',' + pd.Series(longitude).astype(str),
+        'place': place_names[place_ids],
+        'date': dates.strftime('%Y-%m-%d').values[day_of_row],
+        'latitude': latitude,
+        'longitude': longitude,
+        'business_day': business[day_of_row],
+    })
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic visits data")
+    parser.add_argument('--days', type=int, default=3650)
+    parser.add_argument('--visits-per-day', type=int, default=60)
+    parser.add_argument('--places', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, required=True, help="*.csv, *.parquet or a directory (partitioned Parquet)")
+    args = parser.parse_args()
+
+    df = generate_visits(args.days, args.visits_per_day, args.places, seed=args.seed)
+    if args.output.suffix == '.csv':
+        df.to_csv(args.output, index=False)
+    else:
+        from backend.services.visits_storage import VisitsStorage
+        VisitsStorage.write_parquet(df, args.output)
+    print(f"{len(df)} visits written to {args.output}")
+
+if __name__ == '__main__':
+    main()
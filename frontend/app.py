@@ -1,8 +1,12 @@
 import streamlit as st
 from datetime import date
 from components.sidebar import sidebar_navigation
-from services.api import get_visits_by_date
+from services.api import (
+    get_visits_by_date, get_day_summary, get_day_segments, prefetch_visits,
+    get_heatmap_info, get_heatmap_cells, BackendError
+)
 from components.map import plot_routes
+from components.heatmap import plot_heatmap, choose_zoom, tiles_for_bounds
 from components.stats import show_stats
 
 st.set_page_config(page_title="Mapa de rutas", layout="wide")
@@ -28,11 +32,24 @@ if page == "🏷️ Etiquetador":
         st.title(f"visitas del {selected_date.strftime('%d %b %Y')}")
         # Get data from backend
     
-        visits = get_visits_by_date(selected_date)
+        try:
+            visits = get_visits_by_date(selected_date)
+        except BackendError as e:
+            st.error(f"No se pudo consultar el backend: {e}")
+            visits = []
+        summary = get_day_summary(selected_date)
+
+        # Warm the cache with the neighbouring days while this one renders
+        prefetch_visits(selected_date)
 
         # Business day label
-        if visits and "business_day" in visits[0]:
-            if visits[0]["business_day"]:
+        business_day = None
+        if summary and "business_day" in summary:
+            business_day = summary["business_day"]
+        elif visits and "business_day" in visits[0]:
+            business_day = visits[0]["business_day"]
+        if business_day is not None:
+            if business_day:
                 st.success("### 🟢 Día hábil")
             else:
                 st.warning("### 🚩 Día no laboral")
@@ -43,9 +60,43 @@ if page == "🏷️ Etiquetador":
         use_default_route = not visits
         if use_default_route:
             st.warning("⚠️ No hay datos para la fecha seleccionada. Mostrando la ruta de ejemplo por defecto.")
-        plot_routes(visits, use_default=use_default_route)
+        segments = None if use_default_route else get_day_segments(selected_date)
+        plot_routes(
+            visits,
+            use_default=use_default_route,
+            key=selected_date.isoformat(),
+            stops=segments.get("stops") if segments else None
+        )
         if not use_default_route:
-            show_stats(visits)
+            show_stats(visits, summary, segments)
+
+elif page == "🔥 Mapa de calor":
+    col1, col2, col3 = st.columns([1,6,1])
+    with col2:
+        st.title("🔥 Mapa de calor de visitas")
+        try:
+            info = get_heatmap_info()
+        except BackendError as e:
+            st.error(f"No se pudo consultar el backend: {e}")
+            info = None
+
+        if info and info.get("bounds"):
+            day_type = st.radio("Días", ["Todos", "Hábiles", "No laborales"], horizontal=True)
+            years = st.multiselect("Años", info["years"], default=info["years"])
+            business_day = {"Todos": None, "Hábiles": True, "No laborales": False}[day_type]
+
+            # Whole history at a constant cost: a handful of precomputed tiles
+            zoom = choose_zoom(info["bounds"], info["min_zoom"], info["max_zoom"])
+            tiles = tiles_for_bounds(info["bounds"], zoom)
+            try:
+                cells = get_heatmap_cells(zoom, tiles, business_day, years) if years else []
+            except BackendError as e:
+                st.error(f"No se pudo consultar el backend: {e}")
+                cells = []
+            plot_heatmap(cells, info["bounds"], key=(zoom, business_day, tuple(sorted(years))))
+            st.caption(f"{sum(c[2] for c in cells):,} visitas en {len(cells):,} celdas (zoom {zoom})")
+        elif info is not None:
+            st.info("No hay visitas cargadas.")
 
 elif page == "ℹ️ Cómo funciona":
     st.markdown("""
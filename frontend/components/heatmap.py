@@ -0,0 +1,55 @@
+import math
+import streamlit as st
+import streamlit.components.v1 as components
+import folium
+from folium.plugins import HeatMap
+
+from components.map import MAP_WIDTH, MAP_HEIGHT
+
+# Most tiles fetched to cover the data bounds; sets the zoom of the pyramid used
+MAX_TILES = 16
+
+def to_tile(lat, lon, zoom):
+    """Web-mercator tile containing (lat, lon)"""
+    lat = max(min(lat, 85.05112878), -85.05112878)
+    n = 2 ** zoom
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+def tiles_for_bounds(bounds, zoom):
+    (min_lat, min_lon), (max_lat, max_lon) = bounds
+    x0, y0 = to_tile(max_lat, min_lon, zoom)
+    x1, y1 = to_tile(min_lat, max_lon, zoom)
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+def choose_zoom(bounds, min_zoom, max_zoom, max_tiles=MAX_TILES):
+    """Finest zoom whose tiles covering the bounds stay within max_tiles"""
+    zoom = min_zoom
+    for candidate in range(min_zoom, max_zoom + 1):
+        if len(tiles_for_bounds(bounds, candidate)) > max_tiles:
+            break
+        zoom = candidate
+    return zoom
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_heatmap_html(cache_key, _cells, _bounds):
+    """Render the heat layer once per cache_key (zoom, filters and cells hash)"""
+    cells, bounds = _cells, _bounds
+    (min_lat, min_lon), (max_lat, max_lon) = bounds
+    m = folium.Map(location=[(min_lat + max_lat) / 2, (min_lon + max_lon) / 2], zoom_start=11)
+    peak = max(count for _, _, count in cells)
+    # Log-scaled weights so the busiest places do not wash out the rest
+    weights = [[lat, lon, math.log1p(count) / math.log1p(peak)] for lat, lon, count in cells]
+    HeatMap(weights, name="Visitas", radius=12, blur=15, min_opacity=0.3).add_to(m)
+    m.fit_bounds([[min_lat, min_lon], [max_lat, max_lon]])
+    return m.get_root().render()
+
+def plot_heatmap(cells, bounds, key):
+    if not cells or not bounds:
+        st.info("No hay visitas para los filtros seleccionados.")
+        return
+    # The filters plus a hash of the cells: after a hot reload the refetched
+    # tiles render a new map instead of the cached one
+    html = build_heatmap_html((key, hash(tuple(map(tuple, cells)))), cells, bounds)
+    components.html(html, width=MAP_WIDTH, height=MAP_HEIGHT)
@@ -1,15 +1,68 @@
+import os
 import streamlit as st
+import streamlit.components.v1 as components
 import folium
-from streamlit_folium import st_folium
-from folium.plugins import BeautifyIcon
+from folium.plugins import BeautifyIcon, FastMarkerCluster
 
 # Default route coordinates (example: two points in Bogotá)
 DEFAULT_ROUTE = [
     (4.753851, -74.1019103),
     (4.7579942, -74.1059858)
 ]
+# Above this many points the raw points go in one clustered layer and only
+# the stops keep numbered icons
+MARKER_THRESHOLD = int(os.getenv("MAP_MARKER_THRESHOLD", "100"))
+MAP_WIDTH = 1000
+MAP_HEIGHT = 500
 
-def plot_routes(visits, use_default=False):
+def add_numbered_marker(m, idx, lat, lon, popup):
+    folium.Marker(
+        [lat, lon],
+        popup=popup,
+        icon=BeautifyIcon(
+            number=idx,
+            icon_shape='marker',
+            border_color='#4a89dc',
+            text_color='white',
+            background_color='#4a89dc'
+        )
+    ).add_to(m)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_map_html(cache_key, _coordinates, _stops, threshold):
+    """
+    Render the map to HTML once per (cache_key, threshold); the coordinate
+    lists are not hashed, cache_key identifies them.
+    """
+    coordinates, stops = _coordinates, _stops
+
+    # Center map on the first point
+    m = folium.Map(location=coordinates[0], zoom_start=12, prefer_canvas=len(coordinates) > threshold)
+
+    # Draw the route as a line
+    folium.PolyLine(coordinates, color="blue", weight=4, opacity=0.7, tooltip="Ruta").add_to(m)
+
+    if len(coordinates) <= threshold:
+        # Every raw point as a small dot
+        for lat, lon in coordinates:
+            folium.CircleMarker([lat, lon], radius=3, color="#4a89dc", fill=True, fill_opacity=0.8).add_to(m)
+    else:
+        # Raw points as a single clustered layer built client-side from one array
+        FastMarkerCluster([list(c) for c in coordinates], name="Puntos").add_to(m)
+
+    # Stops numbered with the annotation point index (start_point/end_point),
+    # the same number the statistics panel shows
+    for lat, lon, place, number in stops[:threshold]:
+        add_numbered_marker(m, number, lat, lon, f"Punto {number}: {place}" if place else f"Punto {number}")
+
+    return m.get_root().render()
+
+def plot_routes(visits, use_default=False, key=None, stops=None):
+    """
+    Draw the day's route. `stops` are the backend segments of the day; their
+    `stop` number is the annotation point index. Without them no point is
+    numbered, so the map never shows an index the annotations do not use.
+    """
     if not visits and not use_default:
         st.info("No hay datos para mostrar en el mapa.")
         return
@@ -17,6 +70,7 @@ def plot_routes(visits, use_default=False):
     # Use default route if requested
     if use_default:
         coordinates = DEFAULT_ROUTE
+        markers = [(lat, lon, None, idx) for idx, (lat, lon) in enumerate(DEFAULT_ROUTE)]
     else:
         # Extract coordinates in order
         coordinates = []
@@ -25,29 +79,14 @@ def plot_routes(visits, use_default=False):
             lon = v.get("longitude") or v.get("lon") or v.get("lng")
             if lat is not None and lon is not None:
                 coordinates.append((lat, lon))
+        markers = [(s["latitude"], s["longitude"], s["place"], s["stop"]) for s in stops or []]
 
     if not coordinates:
         st.warning("No se encontraron coordenadas para el mapa.")
         return
 
-    # Center map on the first point
-    m = folium.Map(location=coordinates[0], zoom_start=12)
-
-    # Draw the route as a line
-    folium.PolyLine(coordinates, color="blue", weight=4, opacity=0.7, tooltip="Ruta").add_to(m)
-
-    # Add friendly numbered markers using BeautifyIcon
-    for idx, (lat, lon) in enumerate(coordinates, start=1):
-        folium.Marker(
-            [lat, lon],
-            popup=f"Punto {idx}",
-            icon=BeautifyIcon(
-                number=idx,
-                icon_shape='marker',
-                border_color='#4a89dc',
-                text_color='white',
-                background_color='#4a89dc'
-            )
-        ).add_to(m)
-
-    st_folium(m, width=1000, height=500)
+    # The caller key plus a hash of the points: a hot reload that changes a day's
+    # data (even keeping its number of points) renders a new map
+    cache_key = ("default",) if use_default else (key, hash((tuple(coordinates), tuple(markers))))
+    html = build_map_html(cache_key, coordinates, markers, MARKER_THRESHOLD)
+    components.html(html, width=MAP_WIDTH, height=MAP_HEIGHT)
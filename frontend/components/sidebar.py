@@ -4,7 +4,7 @@ def sidebar_navigation():
     st.sidebar.title("Secciones")
     page = st.sidebar.radio(
         "",
-        ["ℹ️ Cómo funciona", "🏷️ Etiquetador"],
-        index=2  # Default to how it works
+        ["ℹ️ Cómo funciona", "🏷️ Etiquetador", "🔥 Mapa de calor"],
+        index=0  # Default to how it works
     )
     return page
@@ -1,33 +1,52 @@
 import streamlit as st
 from pandas import to_datetime
 
-def show_stats(visits):
+def format_duration(total_seconds):
+    hours, remainder = divmod(int(total_seconds), 3600)
+    minutes, _ = divmod(remainder, 60)
+    duration_str = []
+    if hours:
+        duration_str.append(f"{hours} hora{'s' if hours > 1 else ''}")
+    if minutes or not duration_str:
+        duration_str.append(f"{minutes} minuto{'s' if minutes != 1 else ''}")
+    return ' '.join(duration_str)
+
+def show_stats(visits, summary=None, segments=None):
     st.markdown("#### Estadísticas")
     if not visits:
         st.write("No hay datos para mostrar estadísticas.")
         return
 
     try:
+        # Precomputed day summary from the backend, if available
+        if summary:
+            st.write(f"**Duración:** {format_duration(summary['duration_seconds'])}")
+            st.write(f"**Distancia recorrida:** {summary['distance_m'] / 1000:.1f} km")
+            st.write(f"**Lugares distintos:** {summary['places']}")
         # Calculate and show duration in a friendly format
-        if "duration" in visits[0]:
+        elif "duration" in visits[0]:
             st.write(f"**Duración:** {visits[0]['duration']}")
         elif "timestamp" in visits[0]:
             t0 = to_datetime(visits[0]["timestamp"])
             t1 = to_datetime(visits[-1]["timestamp"])
-            total_seconds = int((t1 - t0).total_seconds())
-            hours, remainder = divmod(total_seconds, 3600)
-            minutes, _ = divmod(remainder, 60)
-            duration_str = []
-            if hours:
-                duration_str.append(f"{hours} hora{'s' if hours > 1 else ''}")
-            if minutes or not duration_str:
-                duration_str.append(f"{minutes} minuto{'s' if minutes != 1 else ''}")
-            st.write(f"**Duración:** {' '.join(duration_str)}")
+            st.write(f"**Duración:** {format_duration((t1 - t0).total_seconds())}")
             
-        # List all points with their order and place
-        st.markdown("**Puntos del recorrido:**")
-        for idx, v in enumerate(visits, start=1):
-            st.write(f"{idx}. {v.get('place', 'N/A')}")
+        stops = segments.get("stops") if segments else None
+        if stops:
+            # Stops with arrival, departure and dwell time; the number is the
+            # annotation point index, the same one the map markers show
+            st.markdown(f"**Paradas del recorrido** ({len(stops)} paradas, {len(visits)} puntos):")
+            st.caption("El número de cada parada es su índice de punto en las anotaciones (start_point/end_point), igual que en el mapa.")
+            for stop in stops:
+                arrival, departure = stop["arrival"][11:16], stop["departure"][11:16]
+                window = arrival if arrival == departure else f"{arrival}–{departure}"
+                dwell = f" ({format_duration(stop['dwell_seconds'])})" if stop["dwell_seconds"] else ""
+                st.write(f"**Punto {stop['stop']}** · {stop['place']} · {window}{dwell}")
+        else:
+            # Without the segments there are no annotation indexes: list the places in order, unnumbered
+            st.markdown("**Puntos del recorrido:**")
+            for v in visits:
+                st.write(f"- {v.get('place', 'N/A')}")
 
 
     except Exception:
@@ -1,11 +1,154 @@
+import os
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import timedelta
+from typing import Dict, Tuple
+
 import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-BACKEND_URL = "http://backend:8000"  # Use "http://localhost:8000" for local dev
+BACKEND_URL = os.getenv("BACKEND_URL", "http://backend:8000")  # Use "http://localhost:8000" for local dev
+REQUEST_TIMEOUT = float(os.getenv("BACKEND_TIMEOUT", "10"))
+CACHE_TTL = int(os.getenv("FRONTEND_CACHE_TTL", "300"))
+PREFETCH_DAYS = int(os.getenv("PREFETCH_DAYS", "1"))
+# Prefetched responses waiting to be picked up by the cache
+MAX_PREFETCHED = 32
 
-def get_visits_by_date(date):
+logger = logging.getLogger(__name__)
+
+
+class BackendError(Exception):
+    """The backend could not be reached or answered with an error"""
+
+
+def _build_session() -> requests.Session:
+    """Keep-alive session shared by every rerun, retrying idempotent GETs on connection errors"""
+    session = requests.Session()
+    retries = Retry(total=2, connect=2, read=0, backoff_factor=0.2, allowed_methods=["GET"])
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Module objects survive Streamlit reruns (the module is imported once per process)
+_session = _build_session()
+_prefetch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+# date -> (future, submitted at); entries older than CACHE_TTL are stale
+_prefetched: Dict[str, Tuple[Future, float]] = {}
+# date -> when it was last picked: those are in st.cache_data, no prefetch needed
+_picked: Dict[str, float] = {}
+_prefetch_lock = threading.Lock()
+
+
+def _get(path, params):
     try:
-        resp = requests.get(f"{BACKEND_URL}/api/visits", params={"end_date": date})
+        resp = _session.get(f"{BACKEND_URL}{path}", params=params, timeout=REQUEST_TIMEOUT)
         resp.raise_for_status()
-        return resp.json().get("data", [])
-    except Exception as e:
-        return []
+        return resp.json()
+    except (requests.RequestException, ValueError) as e:
+        raise BackendError(str(e)) from e
+
+
+def _request_visits(date_str):
+    return _get("/api/visits", {"end_date": date_str}).get("data", [])
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _cached_visits(date_str):
+    # Use the prefetched response when one is in flight or done
+    with _prefetch_lock:
+        future, submitted = _prefetched.pop(date_str, (None, 0.0))
+    # A response older than the TTL may predate a backend reload
+    if future is not None and time.monotonic() - submitted <= CACHE_TTL:
+        try:
+            return future.result(timeout=REQUEST_TIMEOUT)
+        except Exception:
+            logger.info("Prefetch of %s failed, fetching again", date_str)
+    return _request_visits(date_str)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _cached_day_summary(date_str):
+    days = _get("/api/days", {"start": date_str, "end": date_str}).get("data", [])
+    return days[0] if days else None
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _cached_day_segments(date_str):
+    return _get(f"/api/days/{date_str}/segments", {})
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _cached_heatmap_info():
+    return _get("/api/heatmap", {})
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False, max_entries=512)
+def _cached_heatmap_tile(z, x, y, business_day, years):
+    params = {"year": list(years)}
+    if business_day is not None:
+        params["business_day"] = str(business_day).lower()
+    return _get(f"/api/heatmap/{z}/{x}/{y}", params).get("data", [])
+
+
+def prefetch_visits(date, days=PREFETCH_DAYS):
+    """Fetch the neighbouring dates in the background so the next pick is a cache hit"""
+    now = time.monotonic()
+    with _prefetch_lock:
+        for stale in [d for d, (_, submitted) in _prefetched.items() if now - submitted > CACHE_TTL]:
+            del _prefetched[stale]
+        for old in [d for d, picked in _picked.items() if now - picked > CACHE_TTL]:
+            del _picked[old]
+    for delta in range(1, days + 1):
+        for neighbour in (date - timedelta(days=delta), date + timedelta(days=delta)):
+            date_str = neighbour.isoformat()
+            with _prefetch_lock:
+                # Already prefetched, or picked recently and still cached
+                if date_str in _prefetched or date_str in _picked:
+                    continue
+                _prefetched[date_str] = (_prefetch_executor.submit(_request_visits, date_str), now)
+                while len(_prefetched) > MAX_PREFETCHED:
+                    _prefetched.pop(next(iter(_prefetched)))
+
+
+def get_visits_by_date(date):
+    """Visits of one day; raises BackendError when the backend fails"""
+    date_str = date.isoformat()
+    with _prefetch_lock:
+        _picked[date_str] = time.monotonic()
+    return _cached_visits(date_str)
+
+
+def get_day_summary(date):
+    try:
+        return _cached_day_summary(date.isoformat())
+    except BackendError as e:
+        logger.warning("Day summary for %s unavailable: %s", date, e)
+        return None
+
+
+def get_day_segments(date):
+    """Stops and moves of one day, None when unavailable"""
+    try:
+        return _cached_day_segments(date.isoformat())
+    except BackendError as e:
+        logger.warning("Segments for %s unavailable: %s", date, e)
+        return None
+
+
+def get_heatmap_info():
+    """Zoom range, bounds and years of the density pyramid; raises BackendError"""
+    return _cached_heatmap_info()
+
+
+def get_heatmap_cells(zoom, tiles, business_day=None, years=()):
+    """[lat, lon, count] cells of the given tiles; raises BackendError"""
+    years = tuple(sorted(years))
+    cells = []
+    for x, y in tiles:
+        cells.extend(_cached_heatmap_tile(zoom, x, y, business_day, years))
+    return cells
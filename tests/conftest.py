@@ -0,0 +1,40 @@
+import json
+import pandas as pd
+import pytest
+
+from backend.services.visits_etl import VisitsETL
+
+PLACES = ['Casa', 'Oficina Centro', 'Éxito Calle 13', 'Bodega Norte']
+
+def raw_visits(start: str, days: int, points: int = 12) -> pd.DataFrame:
+    """Raw export rows (timestamp, point, place): `points` visits per day, every 30 minutes from 07:00"""
+    rows = []
+    for day in pd.date_range(start, periods=days, freq='D'):
+        for i in range(points):
+            lat, lon = 4.6 + 0.01 * (i % 4), -74.1 - 0.01 * (i % 4)
+            rows.append({
+                'timestamp': (day + pd.Timedelta(hours=7, minutes=30 * i)).strftime('%Y-%m-%d %H:%M:%S'),
+                'point': f"{lat},{lon}",
+                # Pairs of visits at the same place, collapsed by the routes
+                'place': PLACES[(i // 2) % len(PLACES)]
+            })
+    return pd.DataFrame(rows)
+
+def write_jsonl(path, records) -> None:
+    with open(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+@pytest.fixture
+def business_days(tmp_path):
+    path = tmp_path / 'business_days.csv'
+    pd.DataFrame({'fecha': pd.date_range('2015-06-01', periods=30, freq='B').strftime('%Y-%m-%d')}).to_csv(path, index=False)
+    return path
+
+@pytest.fixture
+def routes_path(tmp_path, business_days):
+    """routes/ dataset of 2015-06-01..10 written by the ETL"""
+    raw = tmp_path / 'raw.csv'
+    raw_visits('2015-06-01', 10).to_csv(raw, index=False)
+    VisitsETL.run(raw, business_days, tmp_path / 'etl')
+    return tmp_path / 'etl' / 'routes'
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from backend.services.contract_generator import ContractGenerator, CONTRACT_CSV, CONTRACT_PARQUET
+from tests.conftest import write_jsonl
+
+def annotations(start: str, days: int, working=lambda i: True):
+    return [
+        {'date': day.strftime('%Y-%m-%d'), 'working': working(i), 'start_point': 0, 'end_point': 3, 'total_points': 6, 'note': f"n{i}"}
+        for i, day in enumerate(pd.date_range(start, periods=days, freq='D'))
+    ]
+
+def test_interrupted_batch_is_not_duplicated(tmp_path, routes_path, monkeypatch):
+    batches = tmp_path / 'annotations'
+    batches.mkdir()
+    write_jsonl(batches / 'a.jsonl', annotations('2015-06-01', 4))
+    write_jsonl(batches / 'b.jsonl', annotations('2015-06-05', 6))
+    output = tmp_path / 'contract'
+
+    # Batch b fails after its first chunk has been written
+    read_batch = ContractGenerator.read_batch
+    def failing(path, chunksize=50_000):
+        for i, chunk in enumerate(read_batch(path, chunksize)):
+            if path.name == 'b.jsonl' and i == 1:
+                raise RuntimeError("interrupted")
+            yield chunk
+    monkeypatch.setattr(ContractGenerator, 'read_batch', staticmethod(failing))
+    with pytest.raises(RuntimeError):
+        ContractGenerator.run([batches], routes_path, output, chunksize=3)
+
+    monkeypatch.setattr(ContractGenerator, 'read_batch', staticmethod(read_batch))
+    stats = ContractGenerator.run([batches], routes_path, output, chunksize=3)
+    assert stats['batches'] == 1
+
+    contract = pd.read_csv(output / CONTRACT_CSV)
+    assert len(contract) == 10
+    assert contract['date'].is_unique
+    assert len(pd.read_parquet(output / CONTRACT_PARQUET)) == 10
+
+def test_batch_starting_with_non_working_days(tmp_path, routes_path):
+    batches = tmp_path / 'annotations'
+    batches.mkdir()
+    write_jsonl(batches / 'a.jsonl', annotations('2015-06-01', 10, working=lambda i: i >= 4))
+    output = tmp_path / 'contract'
+
+    stats = ContractGenerator.run([batches], routes_path, output, chunksize=3)
+
+    assert stats['contracts'] == 6
+    contract = pd.read_parquet(output / CONTRACT_PARQUET)
+    assert len(contract) == 6
+    assert contract['start_timestamp'].notna().all()
+    assert contract['start_timestamp'].dt.hour.eq(7).all()
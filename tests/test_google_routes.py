@@ -0,0 +1,103 @@
+import asyncio
+import random
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.services.google_routes import GoogleRoutes, MAX_ELEMENTS
+from benchmarks import routes_stub
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setattr(routes_stub, 'FAILURE_RATE', 0.0)
+    routes_stub.app.state.requests = 0
+    routes_stub.app.state.elements = 0
+    random.seed(0)
+    return routes_stub
+
+def client(tmp_path, **kwargs) -> GoogleRoutes:
+    return GoogleRoutes(
+        'stub', tmp_path / 'legs.sqlite', base_url='http://stub', backoff=0.001,
+        transport=httpx.ASGITransport(app=routes_stub.app), **kwargs
+    )
+
+def legs(points: np.ndarray, pairs) -> pd.DataFrame:
+    origin, destination = points[[o for o, _ in pairs]], points[[d for _, d in pairs]]
+    return pd.DataFrame({'o_lat': origin[:, 0], 'o_lon': origin[:, 1], 'd_lat': destination[:, 0], 'd_lon': destination[:, 1]})
+
+def jittered_stops(n: int, seed: int = 0) -> np.ndarray:
+    """Stop centroids around Bogotá, no two on the same rounded coordinates"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([4.6 + rng.uniform(0, 0.2, n), -74.1 + rng.uniform(0, 0.2, n)])
+
+def test_identical_legs_are_requested_once_then_served_from_the_cache(tmp_path, stub):
+    points = jittered_stops(6)
+    frame = legs(points, [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5)] * 8)
+
+    routes = client(tmp_path)
+    first = asyncio.run(routes.compute(frame))
+    routes.close()
+    assert routes.stats['legs'] == 40 and routes.stats['unique'] == 5
+    assert stub.app.state.elements >= 5 and routes.stats['requests'] == stub.app.state.requests
+    assert first['distance_m'].notna().all()
+    # Repeated legs get the same answer
+    assert (first['distance_m'].values.reshape(8, 5) == first['distance_m'].values[:5]).all()
+
+    requests = stub.app.state.requests
+    again = client(tmp_path)
+    second = asyncio.run(again.compute(frame))
+    again.close()
+    assert again.stats['requests'] == 0 and again.stats['cached'] == 5
+    assert stub.app.state.requests == requests
+    pd.testing.assert_frame_equal(first, second)
+
+def test_unavailable_answers_are_retried(tmp_path, stub, monkeypatch):
+    monkeypatch.setattr(routes_stub, 'FAILURE_RATE', 0.3)
+    points = jittered_stops(30)
+    frame = legs(points, [(i, (i + 1) % 30) for i in range(30)])
+
+    routes = client(tmp_path, max_retries=10)
+    result = asyncio.run(routes.compute(frame))
+    routes.close()
+
+    assert routes.stats['retries'] > 0
+    assert result['distance_m'].notna().all()
+
+def test_matrices_stay_within_the_element_limit(tmp_path, stub):
+    # Every pair among 60 stops: 3540 legs, more than 5 full matrices
+    points = jittered_stops(60)
+    frame = legs(points, [(o, d) for o in range(60) for d in range(60) if o != d])
+
+    routes = client(tmp_path)
+    keys, _ = routes.round_legs(frame)
+    batches = routes.plan([tuple(int(v) for v in row) for row in keys])
+    assert max(len(origins) * len(destinations) for origins, destinations in batches) <= MAX_ELEMENTS
+    # The stub rejects larger matrices with 400, which would raise RoutesError
+    result = asyncio.run(routes.compute(frame))
+    routes.close()
+    assert result['distance_m'].notna().all()
+
+def test_min_fill_trades_requests_for_billed_elements(tmp_path, stub):
+    """
+    Moves between jittered stop centroids share few destinations: at the
+    default min_fill=0.9 that is about one request per origin, but almost
+    every billed element is a leg we need. min_fill=0 packs the same legs
+    in a handful of requests and pays for the whole matrices.
+    """
+    rng = np.random.default_rng(1)
+    points = jittered_stops(300)
+    pairs = {(int(o), int(d)) for o, d in rng.integers(0, 300, size=(900, 2)) if o != d}
+    frame = legs(points, sorted(pairs))
+
+    strict = client(tmp_path / 'strict')
+    asyncio.run(strict.compute(frame))
+    strict.close()
+    packed = client(tmp_path / 'packed', min_fill=0.0)
+    asyncio.run(packed.compute(frame))
+    packed.close()
+
+    assert strict.stats['elements'] <= len(pairs) / 0.9
+    assert strict.stats['requests'] > 0.8 * len({o for o, _ in pairs})
+    assert packed.stats['requests'] <= strict.stats['requests'] / 10
+    assert packed.stats['elements'] > 10 * len(pairs)
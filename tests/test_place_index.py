@@ -0,0 +1,57 @@
+import pytest
+
+from backend.services.place_index import PlaceIndex, normalize_text
+
+PLACES = [
+    'Éxito Calle 13',
+    'EXITO  calle 134',
+    'Oficina Centro',
+    'Bodega Álamos',
+    'Calle 80 # 10-20, Bogotá',
+    'C.C. Unicentro (Local 2)',
+    'Ca',
+    'Cliente Suba',
+    'Plaza de Bolívar [norte]',
+]
+
+@pytest.fixture
+def index():
+    return PlaceIndex(PLACES)
+
+def brute_force(query: str) -> list:
+    query = normalize_text(query)
+    return [code for code, place in enumerate(PLACES) if query in normalize_text(place)]
+
+def test_accents_and_case_are_folded(index):
+    assert index.match_codes('exito calle').tolist() == [0, 1]
+    assert index.match_codes('ÁLAMOS').tolist() == [3]
+    assert index.match_codes('bogota').tolist() == index.match_codes('BOGOTÁ').tolist() == [4]
+
+def test_short_queries_scan_every_name(index):
+    # Fewer than 3 characters has no trigram: every name is checked
+    assert index.match_codes('ca').tolist() == brute_force('ca')
+    assert index.match_codes('ÉX').tolist() == [0, 1]
+    assert index.match_codes('').tolist() == list(range(len(PLACES)))
+    assert index.match_codes('   ').tolist() == list(range(len(PLACES)))
+
+@pytest.mark.parametrize('query', ['c.c.', '(local', '#', '10-20,', '[norte]', '.*', 'c.c', 'a+'])
+def test_regex_metacharacters_are_literal(index, query):
+    assert index.match_codes(query).tolist() == brute_force(query)
+
+def test_regex_metacharacters_match_only_themselves(index):
+    # As patterns these would match nearly every name
+    assert index.match_codes('.*').tolist() == []
+    assert index.match_codes('a+').tolist() == []
+    assert index.match_codes('c.c.').tolist() == [5]
+    assert index.match_codes('(local 2)').tolist() == [5]
+    assert index.match_codes('[norte]').tolist() == [8]
+
+def test_no_match(index):
+    assert index.match_codes('zzz').tolist() == []
+    assert index.match_codes('calle 999').tolist() == []
+
+def test_parity_with_brute_force(index):
+    queries = {place[i:i + n] for place in PLACES for n in (1, 2, 3, 5, 8) for i in range(len(place))}
+    queries |= {'  Calle   80 ', 'centro bodega', 'bolivar [', 'suba'}
+    for query in sorted(queries):
+        assert index.match_codes(query).tolist() == brute_force(query), query
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from backend.services.geo import METERS_PER_DEGREE
+from backend.services.route_simplification import RouteSimplification
+
+def visits(timestamps, places) -> pd.DataFrame:
+    return pd.DataFrame({'timestamp': pd.to_datetime(timestamps), 'place': places})
+
+def test_collapse_never_merges_across_days():
+    df = visits(
+        ['2015-06-01 07:00', '2015-06-01 23:30', '2015-06-02 00:10', '2015-06-02 08:00', '2015-06-03 09:00'],
+        ['Casa', 'Casa', 'Casa', 'Casa', 'Casa']
+    )
+    # Each day keeps its first visit even at the place the previous day ended
+    assert RouteSimplification.collapse_consecutive(df).tolist() == [True, False, True, False, True]
+
+def test_collapse_keeps_the_first_of_each_run():
+    df = visits(
+        ['2015-06-01 07:00', '2015-06-01 07:30', '2015-06-01 08:00', '2015-06-01 08:30', '2015-06-01 09:00'],
+        ['Casa', 'Casa', 'Oficina', 'Oficina', 'Casa']
+    )
+    assert RouteSimplification.collapse_consecutive(df).tolist() == [True, False, True, False, True]
+    # Same result on the categorical place column of the visits index
+    categorical = df.assign(place=df['place'].astype('category'))
+    assert RouteSimplification.collapse_consecutive(categorical).tolist() == [True, False, True, False, True]
+
+def test_collapse_of_an_empty_frame():
+    assert RouteSimplification.collapse_consecutive(visits([], [])).tolist() == []
+
+def test_douglas_peucker_keeps_endpoints_and_drops_collinear_points():
+    latitude = np.linspace(4.60, 4.70, 11)
+    longitude = np.linspace(-74.10, -74.00, 11)
+    keep = RouteSimplification.douglas_peucker(latitude, longitude, tolerance=1.0)
+    assert keep.tolist() == [True] + [False] * 9 + [True]
+
+def test_douglas_peucker_drops_points_within_tolerance():
+    # Interior points 10 m off a straight north-south line
+    latitude = np.linspace(4.60, 4.61, 6)
+    longitude = np.full(6, -74.1)
+    offset = 10 / (METERS_PER_DEGREE * np.cos(np.radians(4.6)))
+    longitude[1:-1] += offset * np.array([1, -1, 1, -1])
+
+    kept = RouteSimplification.douglas_peucker(latitude, longitude, tolerance=15.0)
+    assert kept.tolist() == [True, False, False, False, False, True]
+    kept = RouteSimplification.douglas_peucker(latitude, longitude, tolerance=5.0)
+    assert kept.all()
+
+def test_douglas_peucker_keeps_a_corner():
+    latitude = np.array([4.60, 4.605, 4.61, 4.61, 4.61])
+    longitude = np.array([-74.10, -74.10, -74.10, -74.095, -74.09])
+    keep = RouteSimplification.douglas_peucker(latitude, longitude, tolerance=1.0)
+    assert keep.tolist() == [True, False, True, False, True]
+
+def test_douglas_peucker_short_inputs():
+    assert RouteSimplification.douglas_peucker(np.array([]), np.array([]), 1.0).tolist() == []
+    assert RouteSimplification.douglas_peucker(np.array([4.6]), np.array([-74.1]), 1.0).tolist() == [True]
+    assert RouteSimplification.douglas_peucker(np.array([4.6, 4.7]), np.array([-74.1, -74.0]), 1.0).tolist() == [True, True]
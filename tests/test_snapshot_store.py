@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from backend.services.heatmap import KEY_SHIFT
+from backend.services.snapshot_store import SnapshotStore
+from backend.services.visits_index import VisitsIndex
+from backend.services.visits_etl import VisitsETL
+from tests.conftest import raw_visits
+
+def test_attached_snapshot_shares_the_heatmap(tmp_path):
+    df = VisitsETL.prepare(raw_visits('2015-06-01', 5), pd.DataFrame({'fecha': ['2015-06-01', '2015-06-02']}))
+    built = VisitsIndex(df, version='v1')
+    store = SnapshotStore(tmp_path / 'snapshots')
+    store.publish(built)
+
+    attached = store.attach('v1')
+
+    pyramid, expected = attached._heatmap, built.heatmap()
+    assert pyramid is not None
+    assert (pyramid.min_zoom, pyramid.max_zoom, pyramid.years, pyramid.bounds) == \
+        (expected.min_zoom, expected.max_zoom, expected.years, expected.bounds)
+    for zoom, (keys, counts) in expected.levels.items():
+        np.testing.assert_array_equal(pyramid.levels[zoom][0], keys)
+        np.testing.assert_array_equal(pyramid.levels[zoom][1], counts)
+    tile_id = int(expected.levels[14][0][0]) >> KEY_SHIFT
+    x, y = tile_id >> 14, tile_id & ((1 << 14) - 1)
+    tile = attached.heatmap().tile(14, x, y)
+    assert tile['count'].sum() > 0
+    assert tile.equals(expected.tile(14, x, y))
+    assert attached.memory_usage() > pyramid.memory_usage() > 0
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.services.filtering_visits import FilteringVisits
+from backend.services.geo import decode_coordinates, encode_coordinates, haversine_m
+from backend.services.spatial_index import SpatialIndex
+from backend.services.visits_index import VisitsIndex
+
+def random_visits(n: int = 5000, days: int = 10, seed: int = 0) -> pd.DataFrame:
+    """Visits scattered over ~0.3 degrees around Bogotá (30 grid rows and columns), a few without coordinates"""
+    rng = np.random.default_rng(seed)
+    latitude = 4.6 + rng.uniform(-0.15, 0.15, n)
+    longitude = -74.1 + rng.uniform(-0.15, 0.15, n)
+    latitude[::97] = np.nan
+    seconds = np.sort(rng.integers(0, days * 86400, n))
+    return pd.DataFrame({
+        'timestamp': pd.Timestamp('2015-06-01') + pd.to_timedelta(seconds, unit='s'),
+        'place': rng.choice(['Casa', 'Oficina Centro', 'Bodega Norte'], n),
+        'latitude': latitude,
+        'longitude': longitude,
+    })
+
+@pytest.fixture(scope='module')
+def visits():
+    return random_visits()
+
+@pytest.fixture(scope='module')
+def spatial(visits):
+    # Built the way VisitsIndex builds it, on the scaled int32 columns
+    return SpatialIndex(encode_coordinates(visits['latitude']), encode_coordinates(visits['longitude']))
+
+def degrees(visits):
+    return decode_coordinates(encode_coordinates(visits['latitude'])), decode_coordinates(encode_coordinates(visits['longitude']))
+
+def brute_bbox(visits, min_lat, min_lon, max_lat, max_lon):
+    lat, lon = degrees(visits)
+    return np.flatnonzero((lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon))
+
+def brute_radius(visits, latitude, longitude, radius_m):
+    lat, lon = degrees(visits)
+    return np.flatnonzero(haversine_m(latitude, longitude, lat, lon) <= radius_m)
+
+@pytest.mark.parametrize('box', [
+    (4.55, -74.15, 4.65, -74.05),      # ten grid rows and columns
+    (4.45, -74.25, 4.75, -73.95),      # the whole cloud
+    (4.6001, -74.1001, 4.6049, -74.0951),  # inside a single cell
+    (4.5, -74.0, 4.7, -73.9),          # past the edge of the cloud
+    (5.0, -75.0, 5.1, -74.9),          # empty
+])
+def test_bbox_matches_brute_force(visits, spatial, box):
+    assert spatial.bbox(*box).tolist() == brute_bbox(visits, *box).tolist()
+
+def test_bbox_includes_points_on_the_edges(visits, spatial):
+    lat, lon = degrees(visits)
+    row = int(np.flatnonzero(np.isfinite(lat))[10])
+    box = (lat[row], lon[row], lat[row] + 0.05, lon[row] + 0.05)
+    found = spatial.bbox(*box)
+    assert row in found
+    assert found.tolist() == brute_bbox(visits, *box).tolist()
+
+@pytest.mark.parametrize('center, radius_m', [
+    ((4.6, -74.1), 500),
+    ((4.6, -74.1), 5000),               # several grid rows
+    ((4.62, -74.03), 12000),            # reaches the edge of the cloud
+    ((4.6, -74.1), 1),
+])
+def test_radius_matches_brute_force(visits, spatial, center, radius_m):
+    assert spatial.radius(*center, radius_m).tolist() == brute_radius(visits, *center, radius_m).tolist()
+
+def test_missing_coordinates_are_never_returned(visits, spatial):
+    missing = set(np.flatnonzero(visits['latitude'].isna()))
+    assert missing
+    assert not missing & set(spatial.bbox(-90, -180, 90, 180).tolist())
+
+@pytest.mark.parametrize('start_date, end_date', [
+    ('2015-06-03', '2015-06-05'),
+    ('2015-06-01', '2015-06-01'),
+    ('2015-06-10', None),
+    (None, '2015-06-02'),
+    ('2015-07-01', '2015-07-02'),
+])
+def test_date_restricted_spatial_queries(visits, start_date, end_date):
+    index = VisitsIndex(visits, version='test')
+    day = index.df['timestamp'].dt.normalize()
+    in_dates = np.ones(len(index.df), dtype=bool)
+    if start_date:
+        in_dates &= (day >= pd.Timestamp(start_date)).values
+    if end_date:
+        in_dates &= (day <= pd.Timestamp(end_date)).values
+    lat, lon = decode_coordinates(index.df['latitude'].values), decode_coordinates(index.df['longitude'].values)
+
+    box = (4.55, -74.15, 4.65, -74.05)
+    inside = (lat >= box[0]) & (lat <= box[2]) & (lon >= box[1]) & (lon <= box[3])
+    found = FilteringVisits.within_bbox(index, *box, start_date=start_date, end_date=end_date)
+    assert found.index.tolist() == np.flatnonzero(inside & in_dates).tolist()
+
+    near = haversine_m(4.6, -74.1, lat, lon) <= 3000
+    found = FilteringVisits.nearby(index, 4.6, -74.1, 3000, start_date=start_date, end_date=end_date)
+    assert found.index.tolist() == np.flatnonzero(near & in_dates).tolist()
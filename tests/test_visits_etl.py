@@ -0,0 +1,25 @@
+import pandas as pd
+
+from backend.services.visits_etl import VisitsETL, VISITS_DIR, ROUTES_DIR
+from backend.services.visits_storage import VisitsStorage
+from tests.conftest import raw_visits
+
+def read(path):
+    return VisitsStorage.read_parquet(path).sort_values('timestamp').reset_index(drop=True)
+
+def test_incremental_run_completes_the_last_processed_day(tmp_path, business_days):
+    raw = raw_visits('2015-06-01', 5)
+    export = tmp_path / 'visits.csv'
+
+    # The first export stops in the middle of 2015-06-03
+    raw.iloc[:len(raw) // 2].to_csv(export, index=False)
+    VisitsETL.run(export, business_days, tmp_path / 'incremental')
+    raw.to_csv(export, index=False)
+    stats = VisitsETL.run(export, business_days, tmp_path / 'incremental')
+    VisitsETL.run(export, business_days, tmp_path / 'full', full=True)
+
+    assert stats['since'] == '2015-06-03'
+    for name in (VISITS_DIR, ROUTES_DIR):
+        incremental, full = read(tmp_path / 'incremental' / name), read(tmp_path / 'full' / name)
+        assert len(incremental) == len(full)
+        pd.testing.assert_frame_equal(incremental, full)
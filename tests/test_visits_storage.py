@@ -0,0 +1,29 @@
+import pytest
+
+from backend.services.visits_storage import VisitsStorage
+from tests.conftest import raw_visits
+
+def test_date_filter_on_tz_aware_timestamps(tmp_path):
+    df = raw_visits('2015-06-01', 3)
+    df['timestamp'] = df['timestamp'] + '-05:00'
+    VisitsStorage.write_parquet(df, tmp_path / 'visits')
+
+    day = VisitsStorage.read_parquet(tmp_path / 'visits', start_date='2015-06-02', end_date='2015-06-02')
+
+    # Bounds are days in the column's time zone
+    assert len(day) == 12
+    assert set(day['timestamp'].dt.strftime('%Y-%m-%d')) == {'2015-06-02'}
+
+def test_date_filter_on_naive_timestamps(tmp_path):
+    VisitsStorage.write_parquet(raw_visits('2015-06-01', 3), tmp_path / 'visits')
+
+    day = VisitsStorage.read_parquet(tmp_path / 'visits', start_date='2015-06-02', end_date='2015-06-02')
+
+    assert len(day) == 12
+
+def test_date_filter_on_string_timestamps(tmp_path):
+    raw_visits('2015-06-01', 3).to_parquet(tmp_path / 'visits.parquet')
+
+    with pytest.raises(ValueError, match="timestamp column is string"):
+        VisitsStorage.read_parquet(tmp_path / 'visits.parquet', start_date='2015-06-02')
+    assert len(VisitsStorage.read_parquet(tmp_path / 'visits.parquet')) == 36
@@ -0,0 +1,47 @@
+import asyncio
+import time
+import pytest
+
+from backend.services.worker_pool import WorkerPool, PoolSaturated
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+def test_stream_produces_every_chunk_and_frees_its_slot():
+    pool = WorkerPool(max_workers=1, max_queue=0)
+    chunks = asyncio.run(collect(pool.stream(f"{i}\n".encode() for i in range(5))))
+    assert chunks == [b"0\n", b"1\n", b"2\n", b"3\n", b"4\n"]
+    assert pool.stats()["pending"] == 0
+
+def test_stream_holds_a_slot_until_it_ends():
+    pool = WorkerPool(max_workers=1, max_queue=0)
+
+    async def scenario():
+        stream = pool.stream(iter([b"a", b"b"]))
+        with pytest.raises(PoolSaturated):
+            await pool.run(sum, [1, 2])
+        assert await collect(stream) == [b"a", b"b"]
+        return await pool.run(sum, [1, 2])
+
+    assert asyncio.run(scenario()) == 3
+    assert pool.stats()["rejected"] == 1
+
+def test_slow_chunk_times_out():
+    pool = WorkerPool(max_workers=1, max_queue=0, timeout=0.05)
+
+    def slow():
+        yield b"fast"
+        time.sleep(0.3)
+        yield b"slow"
+
+    async def scenario():
+        received = []
+        with pytest.raises(asyncio.TimeoutError):
+            async for chunk in pool.stream(slow()):
+                received.append(chunk)
+        return received
+
+    assert asyncio.run(scenario()) == [b"fast"]
+    assert pool.stats()["timeouts"] == 1
+    time.sleep(0.35)
+    assert pool.stats()["pending"] == 0